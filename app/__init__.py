@@ -2,6 +2,7 @@ from flask import Flask, redirect, url_for
 from flask_admin import Admin
 from flask_admin.contrib.sqla import ModelView
 from flask_sqlalchemy import SQLAlchemy
+from flask_migrate import Migrate
 import os
 from dotenv import load_dotenv
 
@@ -10,6 +11,7 @@ load_dotenv()
 
 # Initialize SQLAlchemy instance
 db = SQLAlchemy()
+migrate = Migrate()
 
 def create_app():
     app = Flask(__name__)
@@ -21,9 +23,11 @@ def create_app():
     
     # Initialize extensions
     db.init_app(app)
+    # Batch mode lets the same migrations alter constraints on SQLite
+    migrate.init_app(app, db, render_as_batch=True)
     
     # Import models
-    from .models import Fighter, Event, Fight, FightRoundStats
+    from .models import Fighter, Event, Fight, FightRoundStats, CrawlTask
     
     # Initialize Admin
     admin = Admin(app, name='MMA Data Collection', template_mode='bootstrap3')
@@ -33,6 +37,7 @@ def create_app():
     admin.add_view(ModelView(Event, db.session))
     admin.add_view(ModelView(Fight, db.session))
     admin.add_view(ModelView(FightRoundStats, db.session))
+    admin.add_view(ModelView(CrawlTask, db.session))
     
     @app.route('/')
     def index():
@@ -42,8 +47,6 @@ def create_app():
     # from .routes import api
     # app.register_blueprint(api, url_prefix='/api')
     
-    # Create tables when app is created
-    with app.app_context():
-        db.create_all()
+    # The schema is managed by migrations (`flask db upgrade`); startup runs no DDL
     
     return app 
\ No newline at end of file
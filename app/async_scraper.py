@@ -0,0 +1,234 @@
+import asyncio
+import traceback
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import aiohttp
+from flask import current_app
+
+from app import db
+from app.config import Config
+from app.fetcher import get_fetcher, close_fetcher, backoff_delay, retry_after_seconds, RETRY_STATUSES, FetchFailed
+from app.frontier import open_frontier
+from app.identity import page_hashes
+from app.persistence import UnitOfWork
+from app.parsers import parse_event_page, card_page_urls
+from app.parse_pool import get_parse_pool, close_parse_pool
+from app.scraper import scrape_event, scrape_fighter, report_dead_letters
+
+
+class AsyncPageClient:
+    """aiohttp client that shares the blocking Fetcher's per-host rate limit, page cache and archive."""
+
+    def __init__(self, rate_limiter, cache=None, archive=None):
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.archive = archive
+        self._semaphores = {}
+        self._session = None
+
+    async def __aenter__(self):
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit_per_host=self.rate_limiter.max_in_flight),
+            timeout=aiohttp.ClientTimeout(sock_connect=Config.SCRAPER_CONNECT_TIMEOUT,
+                                          sock_read=Config.SCRAPER_READ_TIMEOUT),
+            headers={'User-Agent': Config.SCRAPER_USER_AGENT,
+                     'Accept': 'text/html,application/xhtml+xml'},
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._session.close()
+
+    async def fetch(self, url):
+        cached = self.cache.get(url) if self.cache else None
+        if cached and self.cache.is_fresh(cached):
+            return cached.content
+
+        headers = self.cache.conditional_headers(cached) if self.cache else {}
+        host = urlsplit(url).netloc.lower()
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(self.rate_limiter.max_in_flight))
+        attempt = 0
+        while True:
+            retry_after = None
+            try:
+                async with semaphore:
+                    delay = self.rate_limiter.reserve(url)
+                    if delay:
+                        await asyncio.sleep(delay)
+                    async with self._session.get(url, headers=headers) as response:
+                        if response.status in RETRY_STATUSES:
+                            retry_after = retry_after_seconds(response.headers.get('Retry-After'))
+                        elif response.status == 304 and cached:
+                            self.rate_limiter.record_success(url)
+                            self.cache.touch(url)
+                            return cached.content
+                        response.raise_for_status()
+                        content = await response.read()
+                        self.rate_limiter.record_success(url)
+                        if self.cache:
+                            self.cache.put(url, content, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+                        if self.archive:
+                            self.archive.put(url, content)
+                        return content
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # Same retry policy as the blocking Fetcher; other HTTP errors (e.g. 404) are final
+                if isinstance(e, aiohttp.ClientResponseError) and e.status not in RETRY_STATUSES:
+                    self.rate_limiter.record_success(url)
+                    raise
+                self.rate_limiter.record_failure(url, retry_after)
+                delay = backoff_delay(attempt, retry_after) if attempt < Config.SCRAPER_RETRIES else None
+                if delay is None:
+                    raise
+                attempt += 1
+                print(f"[async] Fetch of {url} failed ({e}); retry {attempt} of {Config.SCRAPER_RETRIES} in {delay:.1f}s.")
+                await asyncio.sleep(delay)
+
+
+class AsyncCrawler:
+    """asyncio alternative to main_scraper.
+
+    Pages for several queue entries (an event plus every fighter and
+    fight-details page on its card) are fetched concurrently under the shared
+    rate limit. The fetched bodies are handed to the blocking Fetcher and to
+    the parse pool's worker processes, and the existing scrape_event/
+    scrape_fighter code persists them on a single DB worker thread, so the
+    network never waits on the database.
+    """
+
+    def __init__(self, app, start_url, lookahead=None, resume=False):
+        self.app = app
+        self.fetcher = get_fetcher()
+        self.parse_pool = get_parse_pool()
+        self.frontier = open_frontier(resume=resume, last_fetched=self.fetcher.last_fetched)
+        self.frontier.seed([start_url] if start_url else [])
+        page_hashes.load(db.session)
+        self.frontier.db_session = db.session # Pages whose writes are rolled back are not left marked processed
+        self.scrape_queue = self.frontier
+        self.processed_urls = self.frontier.processed
+        self.scheduled = set()
+        # Pages held by in-flight entries: two cards can share a fighter, so a page is fetched
+        # once for all of them and only forgotten when the last one is written
+        self._fetches = {} # url -> fetch task
+        self._holders = Counter() # url -> in-flight entries holding it
+        self.lookahead = lookahead or Config.SCRAPER_ASYNC_LOOKAHEAD
+        self.parse_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='parse')
+        self.db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db')
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        in_flight = set()
+        async with AsyncPageClient(self.fetcher.rate_limiter, self.fetcher.cache, self.fetcher.archive) as client:
+            while self.scrape_queue or in_flight:
+                while self.scrape_queue and len(in_flight) < self.lookahead:
+                    url = self.scrape_queue.pop()
+                    if url in self.processed_urls or url in self.scheduled:
+                        continue
+                    self.scheduled.add(url)
+                    depth = self.frontier.current_depth
+                    in_flight.add(asyncio.create_task(self.process(client, loop, url, depth)))
+                if not in_flight:
+                    break
+                _, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+
+    async def process(self, client, loop, url, depth):
+        print(f"\n>>> [async] Processing URL from Queue: {url}")
+        if 'event-details' not in url and 'fighter-details' not in url:
+            print(f"Skipping URL not handled by the async crawler: {url}")
+            self.processed_urls.add(url)
+            return
+
+        bundle = [url]
+        self._holders[url] += 1
+        try:
+            content = await self.fetch(client, url)
+            self.fetcher.preload(url, content)
+            if 'event-details' in url:
+                card_urls = await loop.run_in_executor(self.parse_executor, self.extract_card_urls, content)
+                card_urls = [u for u in card_urls if u not in self.processed_urls]
+                bundle.extend(card_urls)
+                self._holders.update(card_urls)
+                results = await asyncio.gather(*(self.fetch(client, u) for u in card_urls), return_exceptions=True)
+                for card_url, result in zip(card_urls, results):
+                    if isinstance(result, Exception):
+                        # Already retried; the scrape function reports it in context
+                        print(f"[async] Fetch failed for {card_url}: {result}")
+                        self.fetcher.preload(card_url, error=FetchFailed(str(result) or type(result).__name__))
+                    else:
+                        self.fetcher.preload(card_url, result)
+                # Parse the card's pages on worker processes while the DB thread is busy
+                self.parse_pool.prefetch(card_urls, self.fetcher)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as fetch_err:
+            print(f"[async] Fetch failed for {url}: {fetch_err}")
+            self.fetcher.preload(url, error=FetchFailed(str(fetch_err) or type(fetch_err).__name__))
+
+        try:
+            await loop.run_in_executor(self.db_executor, self.persist, url, depth)
+        finally:
+            self.release(bundle)
+            if url not in self.processed_urls:
+                self.scheduled.discard(url) # Its write was rolled back and the frontier queued it again
+
+    def fetch(self, client, url):
+        """The fetch task for url, shared by every in-flight entry that needs the page."""
+        task = self._fetches.get(url)
+        if task is None:
+            task = self._fetches[url] = asyncio.ensure_future(client.fetch(url))
+        return task
+
+    def release(self, bundle):
+        """Forget the preloaded pages and parses of a written entry that no other in-flight entry holds."""
+        released = []
+        for url in bundle:
+            self._holders[url] -= 1
+            if self._holders[url] <= 0:
+                del self._holders[url]
+                self._fetches.pop(url, None)
+                released.append(url)
+        self.fetcher.forget(released)
+        self.parse_pool.forget(released)
+
+    @staticmethod
+    def extract_card_urls(content):
+        event = parse_event_page(content)
+        return card_page_urls(event) if event else []
+
+    def persist(self, url, depth):
+        """Runs on the DB worker thread: parse the preloaded pages and write them."""
+        # Pages popped after this one are in flight too; its links are queued one level below it
+        self.frontier.current_depth = depth
+        with self.app.app_context():
+            try:
+                with UnitOfWork(db.session):
+                    if 'event-details' in url:
+                        scrape_event(url, db.session, self.scrape_queue, self.processed_urls)
+                    else:
+                        scrape_fighter(url, db.session, self.scrape_queue, self.processed_urls)
+            except Exception as e:
+                print(f"Unexpected error persisting {url}: {type(e).__name__} - {e}")
+                traceback.print_exc()
+                db.session.rollback()
+
+    def close(self):
+        self.parse_executor.shutdown(wait=True)
+        self.db_executor.shutdown(wait=True)
+        self.frontier.close()
+
+
+def async_main_scraper(start_url=None, resume=False):
+    """Run the asyncio crawler from start_url, or from the saved frontier if resume=True."""
+    crawler = AsyncCrawler(current_app._get_current_object(), start_url, resume=resume)
+    print("--- Starting Async Scraper ---")
+    try:
+        asyncio.run(crawler.run())
+    except KeyboardInterrupt:
+        print("\n--- Scraping interrupted by user (Ctrl+C) ---")
+    finally:
+        crawler.close()
+        close_fetcher()
+        close_parse_pool()
+        print(f"\n--- Scraping finished ---")
+        print(f"Attempted to process approximately {len(crawler.processed_urls)} unique URLs.")
+        print(f"{len(crawler.scrape_queue)} URLs remaining in queue (if interrupted).")
+        report_dead_letters(crawler.frontier)
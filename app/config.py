@@ -18,4 +18,77 @@ class Config:
     
     # SQLAlchemy configuration
     SQLALCHEMY_DATABASE_URI = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-    SQLALCHEMY_TRACK_MODIFICATIONS = False 
\ No newline at end of file
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Scraper HTTP client configuration
+    SCRAPER_CONNECT_TIMEOUT = float(os.environ.get('SCRAPER_CONNECT_TIMEOUT') or 5)
+    SCRAPER_READ_TIMEOUT = float(os.environ.get('SCRAPER_READ_TIMEOUT') or 30)
+    SCRAPER_POOL_SIZE = int(os.environ.get('SCRAPER_POOL_SIZE') or 10)
+    SCRAPER_USER_AGENT = os.environ.get('SCRAPER_USER_AGENT') or 'Mozilla/5.0 (compatible; MMADataCollection/1.0)'
+
+    # Scraper politeness: per-host request budget shared by all fetches
+    SCRAPER_REQUESTS_PER_SECOND = float(os.environ.get('SCRAPER_REQUESTS_PER_SECOND') or 2)
+    SCRAPER_BURST = int(os.environ.get('SCRAPER_BURST') or 1)
+    SCRAPER_MAX_IN_FLIGHT = int(os.environ.get('SCRAPER_MAX_IN_FLIGHT') or 4)
+
+    # asyncio crawl mode: queue entries (events/fighters) fetched ahead of the DB writer
+    SCRAPER_ASYNC_LOOKAHEAD = int(os.environ.get('SCRAPER_ASYNC_LOOKAHEAD') or 3)
+
+    # Raw page cache: pages younger than the TTL (seconds) skip the network,
+    # older ones are revalidated with conditional GETs. Empty dir disables it.
+    SCRAPER_CACHE_DIR = os.environ.get('SCRAPER_CACHE_DIR', 'instance/page_cache')
+    SCRAPER_CACHE_TTL = int(os.environ.get('SCRAPER_CACHE_TTL') or 86400)
+    # Archive of every version of every downloaded page: rolling .warc.gz files of at most
+    # SCRAPER_ARCHIVE_FILE_MB plus a SQLite index. Empty dir (the default) disables it.
+    SCRAPER_ARCHIVE_DIR = os.environ.get('SCRAPER_ARCHIVE_DIR', '')
+    SCRAPER_ARCHIVE_FILE_MB = int(os.environ.get('SCRAPER_ARCHIVE_FILE_MB') or 100)
+
+    # Crawl frontier checkpoint file (queue + visited set) used by --resume
+    SCRAPER_FRONTIER_PATH = os.environ.get('SCRAPER_FRONTIER_PATH', 'instance/crawl_frontier.sqlite3')
+    SCRAPER_CHECKPOINT_EVERY = int(os.environ.get('SCRAPER_CHECKPOINT_EVERY') or 25)
+    # Events dated within this many days (or upcoming) are crawled before everything else
+    SCRAPER_RECENT_EVENT_DAYS = int(os.environ.get('SCRAPER_RECENT_EVENT_DAYS') or 30)
+
+    # Completed-events listing used by `flask sync`
+    SCRAPER_EVENTS_URL = os.environ.get('SCRAPER_EVENTS_URL') or 'http://ufcstats.com/statistics/events/completed?page=all'
+
+    # Scraper transactions: one commit per event card, or every N fights when set
+    SCRAPER_FIGHTS_PER_COMMIT = int(os.environ.get('SCRAPER_FIGHTS_PER_COMMIT') or 0)
+
+    # Worker processes that parse prefetched pages (0 = one per CPU core, 1 parses in the crawler process)
+    SCRAPER_PARSE_WORKERS = int(os.environ.get('SCRAPER_PARSE_WORKERS') or 0)
+
+    # BeautifulSoup tree builder for page parsing ('lxml', 'html.parser', ...); falls back to html.parser if not installed
+    SCRAPER_HTML_PARSER = os.environ.get('SCRAPER_HTML_PARSER') or 'lxml'
+
+    # Shared crawl queue for `flask worker` processes: lease per claimed page (seconds), claims per page
+    # before it is marked failed, retry backoff (seconds, doubled per attempt) and idle poll interval
+    SCRAPER_QUEUE_LEASE_SECONDS = int(os.environ.get('SCRAPER_QUEUE_LEASE_SECONDS') or 600)
+    SCRAPER_QUEUE_MAX_ATTEMPTS = int(os.environ.get('SCRAPER_QUEUE_MAX_ATTEMPTS') or 3)
+    SCRAPER_QUEUE_RETRY_DELAY = int(os.environ.get('SCRAPER_QUEUE_RETRY_DELAY') or 60)
+    SCRAPER_QUEUE_POLL_INTERVAL = float(os.environ.get('SCRAPER_QUEUE_POLL_INTERVAL') or 5)
+
+    # Staged crawl pipeline: fetch and parse threads (0 = SCRAPER_MAX_IN_FLIGHT fetchers, one parser per
+    # parse worker), queue entries started but not yet written, fetched pages waiting to be parsed,
+    # and entries the single DB writer commits together
+    SCRAPER_PIPELINE_FETCHERS = int(os.environ.get('SCRAPER_PIPELINE_FETCHERS') or 0)
+    SCRAPER_PIPELINE_PARSERS = int(os.environ.get('SCRAPER_PIPELINE_PARSERS') or 0)
+    SCRAPER_PIPELINE_JOBS = int(os.environ.get('SCRAPER_PIPELINE_JOBS') or 4)
+    SCRAPER_PIPELINE_QUEUE_SIZE = int(os.environ.get('SCRAPER_PIPELINE_QUEUE_SIZE') or 32)
+    SCRAPER_PIPELINE_WRITE_BATCH = int(os.environ.get('SCRAPER_PIPELINE_WRITE_BATCH') or 8)
+
+    # Fetch retries for 429/5xx responses, timeouts and connection errors: retries after the first
+    # attempt, base of the jittered exponential backoff and the longest wait (seconds). A Retry-After
+    # longer than that gives up on the page.
+    SCRAPER_RETRIES = int(os.environ.get('SCRAPER_RETRIES') or 3)
+    SCRAPER_RETRY_BACKOFF = float(os.environ.get('SCRAPER_RETRY_BACKOFF') or 1)
+    SCRAPER_RETRY_MAX_DELAY = float(os.environ.get('SCRAPER_RETRY_MAX_DELAY') or 120)
+    # Circuit breaker: this many failures in a row pause a host for the cooldown (seconds) and halve
+    # its request rate, down to 1/SCRAPER_BREAKER_MAX_SLOWDOWN; as many successes in a row double it again
+    SCRAPER_BREAKER_THRESHOLD = int(os.environ.get('SCRAPER_BREAKER_THRESHOLD') or 5)
+    SCRAPER_BREAKER_COOLDOWN = float(os.environ.get('SCRAPER_BREAKER_COOLDOWN') or 30)
+    SCRAPER_BREAKER_MAX_SLOWDOWN = int(os.environ.get('SCRAPER_BREAKER_MAX_SLOWDOWN') or 16)
+
+    # Skip parsing and writing fighter and fight-details pages (and writing event pages) whose content
+    # hash matches the one stored with their row; 0 rewrites every page. Replays never skip.
+    SCRAPER_SKIP_UNCHANGED = (os.environ.get('SCRAPER_SKIP_UNCHANGED') or '1') != '0'
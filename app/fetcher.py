@@ -0,0 +1,394 @@
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from app.config import Config
+from app.page_archive import PageArchive
+from app.page_cache import PageCache
+
+
+class PageNotCached(requests.exceptions.RequestException):
+    """Raised in offline (replay) mode when a page is neither in the page cache nor in the archive."""
+
+
+class FetchFailed(requests.exceptions.RequestException):
+    """A page fetched outside the Fetcher (e.g. by the asyncio crawler) that could not be downloaded."""
+
+
+# Responses worth retrying: rate limited or a transient server/gateway error
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def retry_after_seconds(value):
+    """Seconds to wait per a Retry-After header (delta-seconds or an HTTP date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt, retry_after=None):
+    """Seconds to wait before retry number `attempt` (0-based), or None to give up.
+
+    Exponential backoff with full jitter (a random wait up to
+    SCRAPER_RETRY_BACKOFF * 2**attempt, capped at SCRAPER_RETRY_MAX_DELAY), so
+    retries from parallel fetches spread out. A Retry-After from the server is
+    a lower bound; if it asks for more than SCRAPER_RETRY_MAX_DELAY, give up.
+    """
+    delay = random.uniform(0, min(Config.SCRAPER_RETRY_MAX_DELAY, Config.SCRAPER_RETRY_BACKOFF * 2 ** attempt))
+    if retry_after is not None:
+        if retry_after > Config.SCRAPER_RETRY_MAX_DELAY:
+            return None
+        delay = max(delay, retry_after)
+    return delay
+
+
+class CircuitBreaker:
+    """Slows a host down after repeated failures.
+
+    Every `threshold` failures in a row trip the breaker: requests to the host
+    pause for `cooldown` seconds (or the server's Retry-After, if longer) and
+    its request rate is halved, down to 1/`max_slowdown` of the configured
+    rate. Each `threshold` successes in a row double the rate again.
+    """
+
+    def __init__(self, bucket, threshold=None, cooldown=None, max_slowdown=None):
+        self.bucket = bucket
+        self.base_rate = bucket.rate
+        self.threshold = threshold or Config.SCRAPER_BREAKER_THRESHOLD
+        self.cooldown = Config.SCRAPER_BREAKER_COOLDOWN if cooldown is None else cooldown
+        self.max_slowdown = max_slowdown or Config.SCRAPER_BREAKER_MAX_SLOWDOWN
+        self.slowdown = 1
+        self.open_until = 0.0
+        self._failures = 0
+        self._successes = 0
+        self._lock = threading.Lock()
+
+    def pause(self):
+        """Seconds until requests may resume (0 unless the breaker just tripped)."""
+        return max(0.0, self.open_until - time.monotonic())
+
+    def record_failure(self, host, retry_after=None):
+        with self._lock:
+            self._successes = 0
+            self._failures += 1
+            if retry_after:
+                # Honored by every request to the host, not just the one that got it
+                self.open_until = max(self.open_until, time.monotonic() + retry_after)
+            if self._failures < self.threshold:
+                return
+            self._failures = 0
+            self.slowdown = min(self.slowdown * 2, self.max_slowdown)
+            self.bucket.rate = self.base_rate / self.slowdown
+            self.open_until = max(self.open_until, time.monotonic() + max(self.cooldown, retry_after or 0))
+        print(f"WARNING: Repeated fetch failures from {host}; pausing {self.pause():.0f}s and slowing requests to 1/{self.slowdown} of the configured rate.")
+
+    def record_success(self, host):
+        with self._lock:
+            self._failures = 0
+            if self.slowdown == 1:
+                return
+            self._successes += 1
+            if self._successes < self.threshold:
+                return
+            self._successes = 0
+            self.slowdown //= 2
+            self.bucket.rate = self.base_rate / self.slowdown
+        print(f"{host} is answering again; request rate back to 1/{self.slowdown} of the configured rate.")
+
+
+class TokenBucket:
+    """Thread-safe token bucket that paces requests to a fixed rate.
+
+    reserve() always hands out a token and returns how long the caller has to
+    wait before using it, so blocking (time.sleep) and asyncio
+    (asyncio.sleep) callers can share the same bucket.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+class HostRateLimiter:
+    """Per-host request budget: a token bucket, a cap on in-flight requests and a circuit breaker."""
+
+    def __init__(self, requests_per_second=None, burst=None, max_in_flight=None):
+        self.requests_per_second = Config.SCRAPER_REQUESTS_PER_SECOND if requests_per_second is None else requests_per_second
+        self.burst = burst or Config.SCRAPER_BURST
+        self.max_in_flight = max_in_flight or Config.SCRAPER_MAX_IN_FLIGHT
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _host_state(self, url):
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                bucket = TokenBucket(self.requests_per_second, self.burst)
+                state = (bucket, threading.BoundedSemaphore(self.max_in_flight), CircuitBreaker(bucket), host)
+                self._hosts[host] = state
+            return state
+
+    def bucket(self, url):
+        return self._host_state(url)[0]
+
+    def breaker(self, url):
+        return self._host_state(url)[2]
+
+    def reserve(self, url):
+        """Take a request slot for url's host; returns the seconds to wait before sending it."""
+        bucket, _, breaker, _ = self._host_state(url)
+        return breaker.pause() + bucket.reserve()
+
+    def acquire(self, url):
+        """Block until a request to url's host may start. Pair with release()."""
+        self._host_state(url)[1].acquire()
+        delay = self.reserve(url)
+        if delay:
+            time.sleep(delay)
+
+    def release(self, url):
+        self._host_state(url)[1].release()
+
+    def record_failure(self, url, retry_after=None):
+        """Count a transient failure (429/5xx, timeout, connection error) against url's host."""
+        _, _, breaker, host = self._host_state(url)
+        breaker.record_failure(host, retry_after)
+
+    def record_success(self, url):
+        _, _, breaker, host = self._host_state(url)
+        breaker.record_success(host)
+
+
+class Fetcher:
+    """Shared HTTP client for every scraper fetch.
+
+    Wraps a single requests.Session so all page fetches reuse pooled
+    keep-alive connections to ufcstats.com instead of opening a new
+    TCP/TLS connection per request. Requests are paced by a per-host
+    HostRateLimiter, and prefetch() lets callers put several pages in
+    flight at once on a small thread pool. When a PageCache is configured,
+    pages younger than its TTL are served from disk and older ones are
+    revalidated with conditional GETs. Timeouts, connection errors and
+    429/5xx responses are retried with jittered exponential backoff, and
+    count towards the host's circuit breaker. With a PageArchive, every
+    page downloaded is also kept as a new version in the archive.
+    """
+
+    def __init__(self, connect_timeout=None, read_timeout=None, pool_size=None, user_agent=None, rate_limiter=None, cache=None,
+                 archive=None, offline=False):
+        self.connect_timeout = connect_timeout or Config.SCRAPER_CONNECT_TIMEOUT
+        self.read_timeout = read_timeout or Config.SCRAPER_READ_TIMEOUT
+        self.pool_size = pool_size or Config.SCRAPER_POOL_SIZE
+        self.rate_limiter = rate_limiter or HostRateLimiter()
+        if cache is None and Config.SCRAPER_CACHE_DIR:
+            cache = PageCache(Config.SCRAPER_CACHE_DIR, Config.SCRAPER_CACHE_TTL)
+        self.cache = cache
+        # Every page downloaded is also appended to the archive (when enabled)
+        if archive is None and Config.SCRAPER_ARCHIVE_DIR:
+            archive = PageArchive(Config.SCRAPER_ARCHIVE_DIR)
+        self.archive = archive
+        # Offline (replay) mode serves every page from the cache (or the archive) and never touches the network
+        self.offline = offline
+        if offline and cache is None and archive is None:
+            raise ValueError("Offline mode needs a page cache or archive (set SCRAPER_CACHE_DIR or SCRAPER_ARCHIVE_DIR)")
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'User-Agent': user_agent or Config.SCRAPER_USER_AGENT,
+            'Accept': 'text/html,application/xhtml+xml',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive',
+        })
+
+        self._executor = None
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+
+    def _get(self, url, revalidate=False):
+        cached = self.cache.get(url) if self.cache else None
+        if self.offline:
+            if cached is None:
+                # Pages evicted from (or never put in) the cache may still be archived
+                archived = self.archive.get(url) if self.archive else None
+                if archived is None:
+                    raise PageNotCached(f"{url} is not in the page cache or archive")
+                return archived.content
+            return cached.content
+        if cached and self.cache.is_fresh(cached) and not revalidate:
+            return cached.content
+
+        headers = self.cache.conditional_headers(cached) if self.cache else {}
+        response = self._get_with_retries(url, headers)
+
+        if response.status_code == 304 and cached:
+            self.cache.touch(url)
+            return cached.content
+        response.raise_for_status()
+        if self.cache:
+            self.cache.put(url, response.content, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        if self.archive:
+            self.archive.put(url, response.content)
+        return response.content
+
+    def _get_with_retries(self, url, headers):
+        """GET url, retrying transient failures (see backoff_delay) up to SCRAPER_RETRIES times."""
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire(url)
+            try:
+                response = self.session.get(url, headers=headers, timeout=(self.connect_timeout, self.read_timeout))
+                error, retry_after = None, None
+                if response.status_code in RETRY_STATUSES:
+                    error = f"HTTP {response.status_code}"
+                    retry_after = retry_after_seconds(response.headers.get('Retry-After'))
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                response, error, retry_after = None, e, None
+            finally:
+                self.rate_limiter.release(url)
+
+            if error is None:
+                self.rate_limiter.record_success(url)
+                return response
+            self.rate_limiter.record_failure(url, retry_after)
+            delay = backoff_delay(attempt, retry_after) if attempt < Config.SCRAPER_RETRIES else None
+            if delay is None:
+                if response is None:
+                    raise error
+                return response # raise_for_status() reports it
+            attempt += 1
+            print(f"Fetch of {url} failed ({error}); retry {attempt} of {Config.SCRAPER_RETRIES} in {delay:.1f}s.")
+            time.sleep(delay)
+
+    def fetch(self, url, revalidate=False):
+        """Fetch a page and return its (decompressed) body as bytes.
+
+        If the page was handed to prefetch() earlier, waits for that request
+        instead of issuing a new one. revalidate=True skips the cache TTL and
+        always checks with the site (for pages that change often, like listings).
+        Transient failures are retried with backoff first. Raises
+        requests.exceptions.RequestException on network or HTTP errors that
+        persist, so callers can keep their existing error handling.
+        """
+        with self._pending_lock:
+            future = self._pending.pop(url, None)
+        if future is not None:
+            return future.result()
+        return self._get(url, revalidate=revalidate)
+
+    def prefetch(self, urls):
+        """Start fetching urls in the background; fetch(url) later collects the result."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.rate_limiter.max_in_flight,
+                                                thread_name_prefix='fetcher')
+        with self._pending_lock:
+            for url in urls:
+                if url not in self._pending:
+                    self._pending[url] = self._executor.submit(self._get, url)
+
+    def pending(self, url):
+        """The Future of a prefetched/preloaded page that has not been collected yet, or None."""
+        with self._pending_lock:
+            return self._pending.get(url)
+
+    def last_fetched(self, url):
+        """When url was last fetched successfully (per the page cache, else the archive), or None."""
+        fetched_at = self.cache.fetched_at(url) if self.cache else None
+        if fetched_at is None and self.archive:
+            fetched_at = self.archive.fetched_at(url)
+        return fetched_at
+
+    def stored_urls(self):
+        """Every URL the page cache or the archive holds a page for (what a replay can read)."""
+        urls = set(self.cache.urls()) if self.cache else set()
+        if self.archive:
+            urls.update(self.archive.urls())
+        return urls
+
+    def preload(self, url, content=None, error=None):
+        """Hand the fetcher a page body fetched elsewhere (e.g. by the asyncio crawler).
+
+        With error set, fetch(url) raises it instead, so a failed fetch is
+        reported by whoever collects the page.
+        """
+        future = Future()
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(content)
+        with self._pending_lock:
+            self._pending[url] = future
+
+    def forget(self, urls):
+        """Drop prefetched pages that will not be collected (e.g. URLs skipped as already processed)."""
+        with self._pending_lock:
+            for url in urls:
+                future = self._pending.pop(url, None)
+                if future is not None:
+                    future.cancel()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        self._pending.clear()
+        self.session.close()
+        if self.archive:
+            self.archive.close()
+
+
+_fetcher = None
+
+def get_fetcher():
+    """Return the process-wide Fetcher, creating it on first use."""
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = Fetcher()
+    return _fetcher
+
+def configure_fetcher(**kwargs):
+    """Replace the process-wide Fetcher with one built from kwargs (e.g. offline=True)."""
+    global _fetcher
+    close_fetcher()
+    _fetcher = Fetcher(**kwargs)
+    return _fetcher
+
+def close_fetcher():
+    """Close the shared Fetcher's connection pool (a new one is created on next use)."""
+    global _fetcher
+    if _fetcher is not None:
+        _fetcher.close()
+        _fetcher = None
@@ -0,0 +1,376 @@
+import heapq
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, timedelta
+from functools import lru_cache
+from urllib.parse import urlsplit, urlunsplit
+
+from app.config import Config
+from app.persistence import on_rollback
+
+
+@lru_cache(maxsize=65536)
+def canonical_url(url):
+    """Normalize a URL so trivially different spellings dedupe to one frontier key.
+
+    Lowercases scheme and host, drops default ports, fragments and trailing
+    slashes, and trims surrounding whitespace.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if (scheme == 'http' and netloc.endswith(':80')) or (scheme == 'https' and netloc.endswith(':443')):
+        netloc = netloc.rsplit(':', 1)[0]
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((scheme, netloc, path, parts.query, ''))
+
+
+def crawl_priority(url, depth, event_date=None, last_fetched=None):
+    """Sort key for the frontier heap; smaller values are crawled first.
+
+    Pages are ranked by type first: upcoming and recent events (within
+    SCRAPER_RECENT_EVENT_DAYS), then events of unknown date, older events,
+    fighters, and anything else. Within a type, pages never fetched before
+    come first, then the ones whose last successful fetch is oldest, and
+    finally the ones closest to the seed.
+    """
+    if 'event-details' in url:
+        if event_date is None:
+            page_rank = 1
+        elif event_date >= date.today() - timedelta(days=Config.SCRAPER_RECENT_EVENT_DAYS):
+            page_rank = 0
+        else:
+            page_rank = 2
+    elif 'fighter-details' in url:
+        page_rank = 3
+    else:
+        page_rank = 4
+    return (page_rank, last_fetched or 0, depth)
+
+
+class ProcessedSet(set):
+    """Visited-URL set keyed by canonical URL that records every addition in its frontier's checkpoint file.
+
+    Like the identity maps, a page marked while its data is being written is
+    unmarked again if that write is rolled back; a page that came off the queue
+    goes back on it, so this run (or a resumed one) visits it again.
+    """
+
+    def __init__(self, frontier, urls=()):
+        super().__init__(canonical_url(url) for url in urls)
+        self.frontier = frontier
+
+    def __contains__(self, url):
+        return super().__contains__(canonical_url(url))
+
+    def add(self, url):
+        key = canonical_url(url)
+        if not super().__contains__(key):
+            entry = self._mark(key)
+            self.frontier._on_rollback(lambda: self._unmark(key, entry))
+        if key in self.frontier.dead_letters:
+            self.frontier._forget_dead_letter(key)
+
+    def mark_failed(self, url, error):
+        """Mark a page that could not be fetched as processed for this run, and dead-letter it."""
+        self.add(url)
+        self.frontier.dead_letter(url, error)
+
+    def has_failed(self, url):
+        return canonical_url(url) in self.frontier.dead_letters
+
+    def discard(self, url):
+        key = canonical_url(url)
+        if super().__contains__(key):
+            self._unmark(key)
+            self.frontier._on_rollback(lambda: self._mark(key))
+
+    def _mark(self, key):
+        super().add(key)
+        return self.frontier._record_processed(key)
+
+    def _unmark(self, key, entry=None):
+        super().discard(key)
+        self.frontier._record_unprocessed(key, entry)
+
+
+class CrawlFrontier:
+    """Priority-scheduled crawl queue plus visited set, checkpointed to a local SQLite file.
+
+    The frontier stands in for the list/set pair main_scraper used to keep
+    in memory: scrape functions still call append(), `in` and
+    processed_urls.add(). URLs are stored by canonical_url() in a heap, with
+    a companion set of queued keys so dedupe checks stay O(1). pop() returns
+    the most urgent page first, see crawl_priority().
+
+    Every change is written through to SQLite and committed every
+    `checkpoint_every` changes (and on close), so a crash or Ctrl+C loses at
+    most one checkpoint's worth of work. A URL stays in the stored queue
+    until it is marked processed, so pages that were popped but never
+    finished are picked up again on resume.
+
+    Pages that could not be fetched (after the fetcher's retries) are kept
+    in a dead-letter set, with their last error, until a later attempt
+    succeeds; retry_dead_letters() queues them again.
+
+    With path=None the frontier is purely in-memory, and with
+    follow_links=False it only crawls what was seeded. `last_fetched` is an
+    optional callable returning the time a URL was last fetched successfully
+    (e.g. from the page cache), used to refresh stale pages first.
+    """
+
+    def __init__(self, path=None, checkpoint_every=None, last_fetched=None, follow_links=True):
+        self.path = path
+        self.checkpoint_every = checkpoint_every or Config.SCRAPER_CHECKPOINT_EVERY
+        self.last_fetched = last_fetched
+        # With follow_links=False only seeded URLs are crawled; links found on pages are ignored
+        self.follow_links = follow_links
+        self.queue = []
+        self._queued = set()
+        self._seq = 0
+        self._local = threading.local() # current_depth, per thread
+        self._popped = {} # key -> (depth, event_date) of popped pages not processed yet
+        self._requeued = set() # Pages put back on the queue after their write was rolled back
+        self.processed = ProcessedSet(self)
+        self.dead_letters = {} # url -> last error
+        self._pending_writes = 0
+        self._lock = threading.RLock()
+        self._conn = None
+        # Session the crawl writes pages with; marks made in its transaction are undone if it rolls back
+        self.db_session = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS frontier (seq INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT NOT NULL UNIQUE)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS visited (url TEXT PRIMARY KEY, visited_at REAL NOT NULL)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS dead_letters (url TEXT PRIMARY KEY, error TEXT, failed_at REAL NOT NULL)")
+            # Scheduling hints, added after the first frontier files were written
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(frontier)")}
+            if 'depth' not in columns:
+                self._conn.execute("ALTER TABLE frontier ADD COLUMN depth INTEGER NOT NULL DEFAULT 0")
+            if 'event_date' not in columns:
+                self._conn.execute("ALTER TABLE frontier ADD COLUMN event_date TEXT")
+            self._conn.commit()
+
+    # --- Queue interface used by the scrape functions ---
+
+    def append(self, url, event_date=None, depth=None):
+        """Queue url unless it is already queued or processed.
+
+        depth defaults to one more than the page currently being processed;
+        event_date is the event's date when known (e.g. from a fighter's fight history).
+        """
+        key = canonical_url(url)
+        with self._lock:
+            if key in self._queued or key in self.processed:
+                return
+            if depth is None:
+                if not self.follow_links:
+                    return
+                depth = self.current_depth + 1
+            self._push(key, depth, event_date)
+            self._write("INSERT OR IGNORE INTO frontier (url, depth, event_date) VALUES (?, ?, ?)",
+                        (key, depth, event_date.isoformat() if event_date else None))
+
+    def _push(self, key, depth, event_date):
+        # Ranked as never fetched until it reaches the top: last_fetched() reads the page cache
+        # (or archive), too slow to call for every link found
+        priority = crawl_priority(key, depth, event_date)
+        self._seq += 1
+        heapq.heappush(self.queue, (priority, self._seq, key, depth, event_date, self.last_fetched is None))
+        self._queued.add(key)
+
+    def pop(self):
+        """Remove and return the most urgent URL. It stays stored until processed."""
+        with self._lock:
+            while True:
+                _, seq, key, depth, event_date, ranked = heapq.heappop(self.queue)
+                if ranked or key in self.processed:
+                    break
+                # Never fetched is the most urgent rank a page can have, so a page fetched before
+                # moves back to its real place, and whatever now tops the queue is checked the same way
+                last_fetched = self.last_fetched(key)
+                if not last_fetched:
+                    break
+                heapq.heappush(self.queue, (crawl_priority(key, depth, event_date, last_fetched), seq, key, depth, event_date, True))
+            self._queued.discard(key)
+            self.current_depth = depth
+            if key not in self.processed:
+                self._popped[key] = (depth, event_date)
+            return key
+
+    @property
+    def current_depth(self):
+        """Depth of the page whose links this thread queues. pop() sets it; a writer with
+        several popped pages in flight sets it to the depth of the page it writes."""
+        return getattr(self._local, 'depth', -1)
+
+    @current_depth.setter
+    def current_depth(self, depth):
+        self._local.depth = depth
+
+    def __contains__(self, url):
+        return canonical_url(url) in self._queued
+
+    def __len__(self):
+        return len(self.queue)
+
+    def __bool__(self):
+        return bool(self.queue)
+
+    # --- Persistence ---
+
+    def seed(self, urls):
+        """Queue start URLs (depth 0) that are neither queued nor processed yet."""
+        for url in urls:
+            if url not in self.processed and url not in self:
+                self.append(url, depth=0)
+
+    def load(self):
+        """Restore the queue and visited set saved by a previous run."""
+        if not self._conn:
+            return
+        with self._lock:
+            visited = [row[0] for row in self._conn.execute("SELECT url FROM visited")]
+            set.update(self.processed, visited)
+            self.queue = []
+            self._queued = set()
+            for url, depth, event_date in self._conn.execute("SELECT url, depth, event_date FROM frontier ORDER BY seq"):
+                if url not in self.processed:
+                    self._push(url, depth, date.fromisoformat(event_date) if event_date else None)
+            self.dead_letters = dict(self._conn.execute("SELECT url, error FROM dead_letters"))
+        print(f"Resumed crawl frontier from {self.path}: {len(self.queue)} queued, {len(self.processed)} processed, "
+              f"{len(self.dead_letters)} failed.")
+
+    def reset(self):
+        """Forget any saved crawl state and start from an empty frontier."""
+        with self._lock:
+            self.queue = []
+            self._queued.clear()
+            self.current_depth = -1
+            self._popped.clear()
+            self._requeued.clear()
+            set.clear(self.processed)
+            self.dead_letters = {}
+            if self._conn:
+                self._conn.execute("DELETE FROM frontier")
+                self._conn.execute("DELETE FROM visited")
+                self._conn.execute("DELETE FROM dead_letters")
+                self._conn.commit()
+                self._pending_writes = 0
+
+    def _record_processed(self, url):
+        """Move url from the queue to the visited table; returns its queue entry (depth, event_date), if any."""
+        with self._lock:
+            entry = self._popped.pop(url, None)
+            if not self._conn:
+                return entry
+            stored = self._conn.execute("SELECT depth, event_date FROM frontier WHERE url = ?", (url,)).fetchone()
+            self._write("INSERT OR REPLACE INTO visited (url, visited_at) VALUES (?, ?)", (url, time.time()))
+            if stored:
+                self._write("DELETE FROM frontier WHERE url = ?", (url,))
+                if entry is None:
+                    entry = (stored[0], date.fromisoformat(stored[1]) if stored[1] else None)
+            return entry
+
+    def _record_unprocessed(self, url, entry=None):
+        """Undo _record_processed: drop the visited row and put a queued page back on the queue.
+
+        A page is put back once per run, so a write that always fails cannot
+        loop; it stays in the stored queue for --resume either way.
+        """
+        with self._lock:
+            self._write("DELETE FROM visited WHERE url = ?", (url,))
+            if entry is None:
+                return
+            depth, event_date = entry
+            self._write("INSERT OR IGNORE INTO frontier (url, depth, event_date) VALUES (?, ?, ?)",
+                        (url, depth, event_date.isoformat() if event_date else None))
+            if url not in self._queued and url not in self._requeued:
+                print(f"Write of {url} was rolled back; queuing it again.")
+                self._requeued.add(url)
+                self._push(url, depth, event_date)
+
+    def _on_rollback(self, callback):
+        if self.db_session is not None:
+            on_rollback(self.db_session, callback)
+
+    # --- Dead letters ---
+
+    def dead_letter(self, url, error):
+        """Record a page that could not be fetched, with its error."""
+        key = canonical_url(url)
+        previous = self.dead_letters.get(key)
+        self._set_dead_letter(key, str(error))
+        self._on_rollback(lambda: self._set_dead_letter(key, previous))
+
+    def _forget_dead_letter(self, url):
+        previous = self.dead_letters.get(url)
+        self._set_dead_letter(url, None)
+        self._on_rollback(lambda: self._set_dead_letter(url, previous))
+
+    def _set_dead_letter(self, url, error):
+        """Store url's dead letter, or remove it when error is None."""
+        with self._lock:
+            if error is None:
+                self.dead_letters.pop(url, None)
+                self._write("DELETE FROM dead_letters WHERE url = ?", (url,))
+            else:
+                self.dead_letters[url] = error
+                self._write("INSERT OR REPLACE INTO dead_letters (url, error, failed_at) VALUES (?, ?, ?)",
+                            (url, error, time.time()))
+
+    def retry_dead_letters(self):
+        """Queue the dead-lettered pages again; returns how many were queued.
+
+        Failed card pages are not queued themselves: their event is
+        dead-lettered too, and scraping it again picks them up, since they are
+        marked unprocessed here.
+        """
+        queued = 0
+        for url in list(self.dead_letters):
+            self.processed.discard(url)
+            if 'fight-details' in url:
+                continue
+            if url not in self:
+                self.append(url, depth=0)
+                queued += 1
+        return queued
+
+    def _write(self, sql, params):
+        if not self._conn:
+            return
+        self._conn.execute(sql, params)
+        self._pending_writes += 1
+        if self._pending_writes >= self.checkpoint_every:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Commit pending frontier changes to disk."""
+        with self._lock:
+            if self._conn and self._pending_writes:
+                self._conn.commit()
+                self._pending_writes = 0
+
+    def close(self):
+        with self._lock:
+            if self._conn:
+                self.checkpoint()
+                self._conn.close()
+                self._conn = None
+
+
+def open_frontier(resume=False, persistent=True, last_fetched=None, follow_links=True):
+    """Build the crawl frontier: resumed from the checkpoint file, or reset for a fresh crawl."""
+    path = Config.SCRAPER_FRONTIER_PATH if persistent else None
+    frontier = CrawlFrontier(path, last_fetched=last_fetched, follow_links=follow_links)
+    if resume:
+        frontier.load()
+    else:
+        frontier.reset()
+    return frontier
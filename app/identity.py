@@ -0,0 +1,132 @@
+import threading
+from urllib.parse import urlsplit
+
+from sqlalchemy import select
+
+from app.config import Config
+from app.models import Fighter, Fight
+
+
+def _page_id(url, page_type):
+    if not url:
+        return None
+    path = urlsplit(url).path.rstrip('/')
+    if f'/{page_type}/' not in path:
+        return None
+    return path.rsplit('/', 1)[-1] or None
+
+
+def fighter_id_from_url(url):
+    """Return the UFCStats fighter ID (the hex part of .../fighter-details/<id>), or None."""
+    return _page_id(url, 'fighter-details')
+
+
+def fight_id_from_url(url):
+    """Return the UFCStats fight ID (the hex part of .../fight-details/<id>), or None."""
+    return _page_id(url, 'fight-details')
+
+
+class FighterIdentityMap:
+    """In-process map from UFCStats fighter ID to `fighters.id`.
+
+    Shared by scrape_event, scrape_fighter and scrape_fight_details so that a
+    fighter seen again during a crawl is resolved without a query or a re-fetch.
+    Only IDs of committed rows should be remembered.
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        return self._ids.get(fighter_id_from_url(url))
+
+    def remember(self, url, fighter_id):
+        ufcstats_id = fighter_id_from_url(url)
+        if ufcstats_id and fighter_id:
+            with self._lock:
+                self._ids[ufcstats_id] = fighter_id
+
+    def forget(self, url):
+        with self._lock:
+            self._ids.pop(fighter_id_from_url(url), None)
+
+    def clear(self):
+        with self._lock:
+            self._ids.clear()
+
+    def lookup(self, url, db_session):
+        """Resolve a fighter URL to a DB id: from the map, else by `ufcstats_id` in the DB."""
+        ufcstats_id = fighter_id_from_url(url)
+        if not ufcstats_id:
+            return None
+        fighter_id = self._ids.get(ufcstats_id)
+        if fighter_id is None:
+            row = db_session.query(Fighter.id).filter_by(ufcstats_id=ufcstats_id).first()
+            if row:
+                fighter_id = row.id
+                self.remember(url, fighter_id)
+        return fighter_id
+
+
+fighter_identities = FighterIdentityMap()
+
+
+class PageHashMap:
+    """In-process map from fighter and fight-details page to the content hash stored with its row.
+
+    Loaded once per crawl, so the parse stage and the scrape functions can tell
+    an unchanged page (see parsers.content_hash) without a query. Like the
+    identity map, only hashes of committed rows should be remembered.
+    """
+
+    PAGE_TYPES = (('fighter-details', Fighter), ('fight-details', Fight))
+
+    def __init__(self):
+        self._hashes = {}
+        self._lock = threading.Lock()
+        self.enabled = False
+
+    @staticmethod
+    def _key(url):
+        for page_type, _ in PageHashMap.PAGE_TYPES:
+            page_id = _page_id(url, page_type)
+            if page_id:
+                return (page_type, page_id)
+        return None
+
+    def load(self, db_session, enabled=True):
+        """Read every stored hash; with enabled=False (or SCRAPER_SKIP_UNCHANGED off) no page counts as unchanged."""
+        self.clear()
+        self.enabled = enabled and Config.SCRAPER_SKIP_UNCHANGED
+        if not self.enabled:
+            return
+        hashes = {}
+        for page_type, model in self.PAGE_TYPES:
+            rows = db_session.execute(select(model.ufcstats_id, model.content_hash)
+                                      .where(model.ufcstats_id.is_not(None), model.content_hash.is_not(None)))
+            hashes.update(((page_type, ufcstats_id), digest) for ufcstats_id, digest in rows)
+        db_session.commit()
+        with self._lock:
+            self._hashes = hashes
+
+    def unchanged(self, url, digest):
+        """True if url's stored row was written from a page with this content hash."""
+        return self.enabled and digest is not None and self._hashes.get(self._key(url)) == digest
+
+    def remember(self, url, digest):
+        key = self._key(url)
+        if self.enabled and key and digest:
+            with self._lock:
+                self._hashes[key] = digest
+
+    def forget(self, url):
+        with self._lock:
+            self._hashes.pop(self._key(url), None)
+
+    def clear(self):
+        with self._lock:
+            self._hashes.clear()
+
+
+page_hashes = PageHashMap()
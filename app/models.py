@@ -5,6 +5,7 @@ class Fighter(db.Model):
     __tablename__ = 'fighters'
     
     id = db.Column(db.Integer, primary_key=True)
+    ufcstats_id = db.Column(db.String(32), unique=True, index=True)  # Hex ID from the fighter-details URL
     first_name = db.Column(db.String(50), nullable=False)
     last_name = db.Column(db.String(50), nullable=False)
     nickname = db.Column(db.String(100))
@@ -29,16 +30,21 @@ class Fighter(db.Model):
     Takedown_Acc = db.Column(db.Float)
     Takedown_Def = db.Column(db.Float)
     Sub_Avg = db.Column(db.Float)
+    content_hash = db.Column(db.String(64)) # parsers.content_hash() of the page last written to this row
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     fights_as_fighter1 = db.relationship('Fight', foreign_keys='Fight.fighter1_id', backref='fighter1', lazy=True)
     fights_as_fighter2 = db.relationship('Fight', foreign_keys='Fight.fighter2_id', backref='fighter2', lazy=True)
+
+    # Name lookups (fight-details fallback, legacy rows without ufcstats_id)
+    __table_args__ = (db.Index('ix_fighters_name', 'first_name', 'last_name'),)
     
     def to_dict(self):
         return {
             'id': self.id,
+            'ufcstats_id': self.ufcstats_id,
             'first_name': self.first_name,
             'last_name': self.last_name,
             'nickname': self.nickname,
@@ -75,11 +81,15 @@ class Event(db.Model):
     event_name = db.Column(db.String(100), nullable=False)
     event_date = db.Column(db.Date, nullable=False)
     location = db.Column(db.String(100))
+    content_hash = db.Column(db.String(64)) # parsers.content_hash() of the event page last written
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     fights = db.relationship('Fight', backref='event', lazy=True, cascade='all, delete-orphan')
+
+    # Natural key used by the scraper's upserts
+    __table_args__ = (db.UniqueConstraint('event_name', 'event_date', name='_event_name_date_uc'),)
     
     def to_dict(self):
         return {
@@ -96,7 +106,8 @@ class Fight(db.Model):
     __tablename__ = 'fights'
     
     id = db.Column(db.Integer, primary_key=True)
-    event_id = db.Column(db.Integer, db.ForeignKey('events.id', ondelete='CASCADE'), nullable=False)
+    ufcstats_id = db.Column(db.String(32), unique=True, index=True)  # Hex ID from the fight-details URL
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id', ondelete='CASCADE'), nullable=False, index=True)
     fighter1_id = db.Column(db.Integer, db.ForeignKey('fighters.id', ondelete='SET NULL'))
     fighter2_id = db.Column(db.Integer, db.ForeignKey('fighters.id', ondelete='SET NULL'))
     winner_id = db.Column(db.Integer, db.ForeignKey('fighters.id', ondelete='SET NULL'), nullable=True)
@@ -166,12 +177,14 @@ class Fight(db.Model):
     fighter2_sig_strikes_ground_landed = db.Column(db.Integer)
     fighter2_sig_strikes_ground_attempted = db.Column(db.Integer)
 
+    content_hash = db.Column(db.String(64)) # parsers.content_hash() of the fight-details page last written
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def to_dict(self):
         return {
             'id': self.id,
+            'ufcstats_id': self.ufcstats_id,
             'event_id': self.event_id,
             'fighter1_id': self.fighter1_id,
             'fighter2_id': self.fighter2_id,
@@ -220,7 +233,7 @@ class FightRoundStats(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     fight_id = db.Column(db.Integer, db.ForeignKey('fights.id', ondelete='CASCADE'), nullable=False)
-    fighter_id = db.Column(db.Integer, db.ForeignKey('fighters.id', ondelete='CASCADE'), nullable=False) # Link to the specific fighter this row is for
+    fighter_id = db.Column(db.Integer, db.ForeignKey('fighters.id', ondelete='CASCADE'), nullable=False, index=True) # Link to the specific fighter this row is for
     round_number = db.Column(db.Integer, nullable=False)
 
     # General Stats for this fighter in this round
@@ -294,4 +307,24 @@ class FightRoundStats(db.Model):
             'sig_strikes_ground_attempted': self.sig_strikes_ground_attempted,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        } 
\ No newline at end of file
+        } 
+
+class CrawlTask(db.Model):
+    """A page in the crawl queue shared by `flask worker` processes (see app/work_queue.py)."""
+    __tablename__ = 'crawl_queue'
+
+    id = db.Column(db.Integer, primary_key=True)
+    url = db.Column(db.String(255), nullable=False, unique=True) # Canonical URL (app.frontier.canonical_url)
+    status = db.Column(db.String(10), nullable=False, default='pending') # pending, leased, done or failed
+    priority = db.Column(db.Integer, nullable=False, default=0) # Page rank from crawl_priority(); lower is crawled first
+    depth = db.Column(db.Integer, nullable=False, default=0) # Link distance from a seed URL
+    attempts = db.Column(db.Integer, nullable=False, default=0) # Times the page has been claimed
+    available_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow) # Not claimed before this (retry backoff)
+    lease_owner = db.Column(db.String(100)) # Worker that claimed (or finished) the page
+    leased_until = db.Column(db.DateTime) # Another worker may reclaim the page after this
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Serves the claim query: the most urgent claimable pages first
+    __table_args__ = (db.Index('ix_crawl_queue_claim', 'status', 'priority', 'depth', 'id'),)
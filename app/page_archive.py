@@ -0,0 +1,192 @@
+"""Append-only archive of every version of every fetched page, in WARC format.
+
+Pages are appended to rolling files of at most SCRAPER_ARCHIVE_FILE_MB
+megabytes, named like WARC files usually are
+(pages-<start time>-<serial>-<pid>.warc.gz), so several crawler processes
+never write to the same file. Each page is one WARC `resource` record in its
+own gzip member: the files are ordinary .warc.gz for standard WARC tools, and
+any record can be decompressed on its own.
+
+A SQLite index (index.sqlite3) maps every URL to the file, offset and length
+of each stored version, with its fetch time and payload digest. get() reads a
+version by slicing the memory-mapped file at that offset and decompressing
+only that member. A page is appended only when its body differs from the
+latest stored version, so re-fetching unchanged pages costs no space; the
+latest version's last-seen time is updated instead (see fetched_at()).
+"""
+import base64
+import gzip
+import hashlib
+import mmap
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timezone
+
+from app.config import Config
+
+
+ArchivedPage = namedtuple('ArchivedPage', ['url', 'content', 'fetched_at', 'digest'])
+
+
+def payload_digest(content):
+    """WARC-Payload-Digest of a page body: SHA-1 in base32, as WARC tools write it."""
+    return 'sha1:' + base64.b32encode(hashlib.sha1(content).digest()).decode('ascii')
+
+
+def warc_record(url, content, fetched_at, digest):
+    """One WARC/1.0 resource record holding a page body."""
+    headers = [
+        'WARC/1.0',
+        'WARC-Type: resource',
+        f'WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>',
+        'WARC-Date: ' + datetime.fromtimestamp(fetched_at, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        f'WARC-Target-URI: {url}',
+        f'WARC-Payload-Digest: {digest}',
+        'Content-Type: text/html',
+        f'Content-Length: {len(content)}',
+    ]
+    return '\r\n'.join(headers).encode('utf-8') + b'\r\n\r\n' + content + b'\r\n\r\n'
+
+
+def parse_warc_record(record):
+    """Split a WARC record into ({header: value}, body)."""
+    head, _, rest = record.partition(b'\r\n\r\n')
+    headers = {}
+    for line in head.decode('utf-8').split('\r\n')[1:]:
+        name, _, value = line.partition(':')
+        headers[name.strip()] = value.strip()
+    return headers, rest[:int(headers['Content-Length'])]
+
+
+class PageArchive:
+    """Rolling .warc.gz files plus a SQLite index from URL to every stored version."""
+
+    def __init__(self, root, max_file_size=None):
+        self.root = root
+        self.max_file_size = max_file_size or Config.SCRAPER_ARCHIVE_FILE_MB * 1024 * 1024
+        os.makedirs(root, exist_ok=True)
+        # Shared by every crawler process; WAL lets them read while one writes
+        self._conn = sqlite3.connect(os.path.join(root, 'index.sqlite3'), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS records (url TEXT NOT NULL, file_id INTEGER NOT NULL, "
+                           "offset INTEGER NOT NULL, length INTEGER NOT NULL, fetched_at REAL NOT NULL, digest TEXT NOT NULL, "
+                           "seen_at REAL)")
+        # Last time the version was fetched, added after the first indexes were written
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(records)")}
+        if 'seen_at' not in columns:
+            self._conn.execute("ALTER TABLE records ADD COLUMN seen_at REAL")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_records_url ON records (url, fetched_at)")
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._started = time.strftime('%Y%m%d%H%M%S', time.gmtime())
+        self._serial = 0
+        self._out = None # (file id, open file) this archive appends to; opened on the first put()
+        self._maps = {} # file id -> (open file, mmap) for reads
+
+    # --- Writing ---
+
+    def put(self, url, content, fetched_at=None):
+        """Append a fetched page unless it matches the URL's latest version; returns True if it was stored.
+
+        An unchanged page only moves its latest version's last-seen time, so
+        the crawl frontier does not rank it as stale again.
+        """
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        digest = payload_digest(content)
+        with self._lock:
+            latest = self._conn.execute("SELECT rowid, digest FROM records WHERE url = ? ORDER BY fetched_at DESC LIMIT 1",
+                                        (url,)).fetchone()
+            if latest and latest[1] == digest:
+                self._conn.execute("UPDATE records SET seen_at = max(coalesce(seen_at, fetched_at), ?) WHERE rowid = ?",
+                                   (fetched_at, latest[0]))
+                self._conn.commit()
+                return False
+            file_id, f = self._output()
+            member = gzip.compress(warc_record(url, content, fetched_at, digest))
+            offset = f.tell()
+            f.write(member)
+            f.flush() # Readers map the file, so the record must reach it before it is indexed
+            self._conn.execute("INSERT INTO records (url, file_id, offset, length, fetched_at, digest, seen_at) "
+                               "VALUES (?, ?, ?, ?, ?, ?, ?)", (url, file_id, offset, len(member), fetched_at, digest, fetched_at))
+            self._conn.commit()
+        return True
+
+    def _output(self):
+        """The file to append to, starting a new one once the current one is full."""
+        if self._out is not None and self._out[1].tell() >= self.max_file_size:
+            self._out[1].close()
+            self._out = None
+        while self._out is None:
+            self._serial += 1
+            name = f"pages-{self._started}-{self._serial:05d}-{os.getpid()}.warc.gz"
+            try:
+                cursor = self._conn.execute("INSERT INTO files (name) VALUES (?)", (name,))
+            except sqlite3.IntegrityError:
+                continue # Taken by another archive opened in this process in the same second
+            self._out = (cursor.lastrowid, open(os.path.join(self.root, name), 'ab'))
+        return self._out
+
+    # --- Reading ---
+
+    def get(self, url, at=None):
+        """The latest stored version of url (fetched at or before `at`, if given), or None."""
+        query = "SELECT file_id, offset, length, fetched_at, digest FROM records WHERE url = ?"
+        params = [url]
+        if at is not None:
+            query += " AND fetched_at <= ?"
+            params.append(at)
+        with self._lock:
+            row = self._conn.execute(query + " ORDER BY fetched_at DESC LIMIT 1", params).fetchone()
+        if row is None:
+            return None
+        file_id, offset, length, fetched_at, digest = row
+        _, content = parse_warc_record(gzip.decompress(self._map(file_id, offset + length)[offset:offset + length]))
+        return ArchivedPage(url, content, fetched_at, digest)
+
+    def _map(self, file_id, size):
+        """Memory map of an archive file covering at least `size` bytes."""
+        with self._lock:
+            f, mapped = self._maps.get(file_id, (None, None))
+            if mapped is None or len(mapped) < size:
+                # The file has grown (it may still be written to) since it was mapped. The old map
+                # is not closed here: another thread may still be reading it; it goes with its last reference.
+                name = self._conn.execute("SELECT name FROM files WHERE id = ?", (file_id,)).fetchone()[0]
+                f = open(os.path.join(self.root, name), 'rb')
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._maps[file_id] = (f, mapped)
+            return mapped
+
+    def versions(self, url):
+        """(fetched_at, digest, file name, offset) of every stored version of url, oldest first."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT r.fetched_at, r.digest, f.name, r.offset FROM records r JOIN files f ON f.id = r.file_id "
+                "WHERE r.url = ? ORDER BY r.fetched_at", (url,)).fetchall()
+
+    def fetched_at(self, url):
+        """When url was last fetched (the latest version's last-seen time), or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT max(coalesce(seen_at, fetched_at)) FROM records WHERE url = ?", (url,)).fetchone()
+        return row[0]
+
+    def urls(self):
+        """Every URL with at least one stored version."""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT DISTINCT url FROM records")]
+
+    def close(self):
+        with self._lock:
+            if self._out is not None:
+                self._out[1].close()
+                self._out = None
+            for f, mapped in self._maps.values():
+                mapped.close()
+                f.close()
+            self._maps = {}
+            self._conn.close()
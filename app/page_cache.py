@@ -0,0 +1,108 @@
+import contextlib
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections import namedtuple
+
+
+CachedPage = namedtuple('CachedPage', ['url', 'content', 'fetched_at', 'etag', 'last_modified'])
+
+
+class PageCache:
+    """On-disk cache of raw UFCStats pages.
+
+    Each URL maps to a pair of files named after the SHA-256 of the URL:
+    a gzip-compressed body and a small JSON sidecar holding the fetch time
+    and the ETag/Last-Modified validators used for conditional GETs.
+    """
+
+    def __init__(self, root, ttl=0):
+        self.root = root
+        self.ttl = ttl
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        directory = os.path.join(self.root, key[:2])
+        return directory, os.path.join(directory, key + '.html.gz'), os.path.join(directory, key + '.json')
+
+    def get(self, url):
+        """Return the CachedPage for url, or None if it was never stored."""
+        _, body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                content = gzip.decompress(f.read())
+        except (OSError, ValueError):
+            return None
+        return CachedPage(url, content, meta.get('fetched_at', 0), meta.get('etag'), meta.get('last_modified'))
+
+    def fetched_at(self, url):
+        """Time of the last successful fetch of url, or None if it was never cached."""
+        _, _, meta_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('fetched_at')
+        except (OSError, ValueError):
+            return None
+
+    def urls(self):
+        """Yield the URL of every cached page."""
+        if not os.path.isdir(self.root):
+            return
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.endswith('.json'):
+                    try:
+                        with open(os.path.join(directory, filename), 'r', encoding='utf-8') as f:
+                            yield json.load(f)['url']
+                    except (OSError, ValueError, KeyError):
+                        continue
+
+    def is_fresh(self, page):
+        return bool(self.ttl) and time.time() - page.fetched_at < self.ttl
+
+    def conditional_headers(self, page):
+        """Request headers that let the server answer 304 Not Modified for page."""
+        headers = {}
+        if page is not None:
+            if page.etag:
+                headers['If-None-Match'] = page.etag
+            if page.last_modified:
+                headers['If-Modified-Since'] = page.last_modified
+        return headers
+
+    def put(self, url, content, etag=None, last_modified=None):
+        directory, body_path, meta_path = self._paths(url)
+        os.makedirs(directory, exist_ok=True)
+        self._write(body_path, gzip.compress(content))
+        self._write_meta(meta_path, {'url': url, 'fetched_at': time.time(),
+                                     'etag': etag, 'last_modified': last_modified})
+
+    def touch(self, url):
+        """Record a successful revalidation (304) without rewriting the body."""
+        page = self.get(url)
+        if page is not None:
+            _, _, meta_path = self._paths(url)
+            self._write_meta(meta_path, {'url': url, 'fetched_at': time.time(),
+                                         'etag': page.etag, 'last_modified': page.last_modified})
+
+    def _write_meta(self, path, meta):
+        self._write(path, json.dumps(meta).encode('utf-8'))
+
+    @staticmethod
+    def _write(path, data):
+        # Write to a temp file and rename so readers never see a partial file. The temp name is
+        # unique per call: fetcher and pipeline threads can store the same URL at once.
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+            raise
@@ -0,0 +1,126 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
+
+from app.config import Config
+from app.identity import page_hashes
+from app.parsers import parse_page, content_hash
+
+
+class ParsePool:
+    """Parses prefetched pages on a pool of worker processes.
+
+    BeautifulSoup parsing is CPU-bound and holds the GIL, so parsing a card's
+    fighter and fight-details pages on the crawler thread serializes them.
+    prefetch() hooks onto the Fetcher's in-flight requests: as each page
+    arrives, its raw bytes are sent to a worker process, which runs the pure
+    parsers in app/parsers.py and sends back the record. parse(url, content)
+    later collects that record, or parses inline if the page was never
+    submitted (or its worker failed), so callers see the same result and the
+    same exceptions either way.
+    """
+
+    def __init__(self, workers=None):
+        workers = Config.SCRAPER_PARSE_WORKERS if workers is None else workers
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = None
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.workers > 1
+
+    def _get_executor(self):
+        if self._executor is None:
+            # Never plain fork: the crawler process has fetcher threads and open DB connections.
+            # A fork server imports the parsers once and forks each worker from that clean process.
+            if 'forkserver' in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context('forkserver')
+                context.set_forkserver_preload(['app.parsers'])
+            else:
+                context = multiprocessing.get_context('spawn')
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        return self._executor
+
+    def submit(self, url, content):
+        """Start parsing a page body in a worker process."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if url not in self._pending:
+                self._pending[url] = self._get_executor().submit(parse_page, content, url)
+
+    def prefetch(self, urls, fetcher):
+        """Parse each of urls in the background as soon as the fetcher has its body."""
+        if not self.enabled:
+            return
+        for url in urls:
+            future = fetcher.pending(url)
+            if future is not None:
+                future.add_done_callback(partial(self._fetched, url))
+
+    def _fetched(self, url, future):
+        # Runs on the fetcher's thread; failed fetches are reported by the fetch() caller
+        if future.cancelled() or future.exception() is not None:
+            return
+        content = future.result()
+        if page_hashes.unchanged(url, content_hash(content)):
+            return # The scrape function skips it, reading only its history links
+        try:
+            self.submit(url, content)
+        except RuntimeError:
+            pass # Pool already shut down
+
+    def preload(self, url, record):
+        """Hand the pool a record parsed elsewhere (e.g. by the crawl pipeline's parse stage)."""
+        future = Future()
+        future.set_result(record)
+        with self._lock:
+            self._pending[url] = future
+
+    def parse(self, url, content):
+        """Return the parsed record for url: the worker's result if one was submitted, else parse inline."""
+        with self._lock:
+            future = self._pending.pop(url, None)
+        if future is not None:
+            try:
+                return future.result()
+            except Exception as e:
+                # Parse again here, so a real parser error surfaces with its traceback in context
+                print(f"Parse worker failed for {url} ({type(e).__name__}: {e}); parsing inline.")
+        return parse_page(content, url)
+
+    def forget(self, urls):
+        """Drop background parses that will not be collected."""
+        with self._lock:
+            for url in urls:
+                future = self._pending.pop(url, None)
+                if future is not None:
+                    future.cancel()
+
+    def close(self):
+        with self._lock:
+            self._pending.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+_parse_pool = None
+
+def get_parse_pool():
+    """Return the process-wide ParsePool, creating it on first use."""
+    global _parse_pool
+    if _parse_pool is None:
+        _parse_pool = ParsePool()
+    return _parse_pool
+
+def close_parse_pool():
+    """Shut down the shared ParsePool's worker processes (a new pool is created on next use)."""
+    global _parse_pool
+    if _parse_pool is not None:
+        _parse_pool.close()
+        _parse_pool = None
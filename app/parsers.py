@@ -0,0 +1,1387 @@
+"""Pure page parsers: UFCStats HTML in, plain records out.
+
+Nothing here touches the database, the fetcher or the crawl frontier. The
+scrape_* functions in app/scraper.py fetch a page, hand its bytes to one of
+the parse_*_page functions below and then persist the returned record, so
+parsing can be run (and timed) on its own. Pages are parsed with the
+SCRAPER_HTML_PARSER backend (lxml by default), keeping only the page parts
+listed in the *_PAGE_PARTS strainers below.
+
+Fighters are referred to by their page URL and by corner: `fighter1` and
+`fighter2` are the first and second fighter as listed on the page being parsed.
+"""
+import hashlib
+import re
+from dataclasses import dataclass, field, fields
+from datetime import datetime
+
+from bs4 import BeautifulSoup, SoupStrainer, Tag # Import Tag for type checking
+from bs4.builder import builder_registry
+
+from app.config import Config
+
+# Per-fighter numbers on a fight-details page. Fight stores them as fighter1_<name>/fighter2_<name>,
+# FightRoundStats as <name> on one row per fighter and round.
+STAT_FIELDS = (
+    'knockdowns',
+    'sig_strikes_landed', 'sig_strikes_attempted', 'sig_strikes_pct',
+    'total_strikes_landed', 'total_strikes_attempted',
+    'takedowns_landed', 'takedowns_attempted', 'takedowns_pct',
+    'submission_attempts', 'reversals', 'control_time_seconds',
+    'sig_strikes_head_landed', 'sig_strikes_head_attempted',
+    'sig_strikes_body_landed', 'sig_strikes_body_attempted',
+    'sig_strikes_leg_landed', 'sig_strikes_leg_attempted',
+    'sig_strikes_distance_landed', 'sig_strikes_distance_attempted',
+    'sig_strikes_clinch_landed', 'sig_strikes_clinch_attempted',
+    'sig_strikes_ground_landed', 'sig_strikes_ground_attempted',
+)
+
+
+@dataclass(slots=True)
+class StatLine:
+    """One fighter's numbers from a fight-details table (whole fight or one round)."""
+    knockdowns: int | None = None
+    sig_strikes_landed: int | None = None
+    sig_strikes_attempted: int | None = None
+    sig_strikes_pct: float | None = None
+    total_strikes_landed: int | None = None
+    total_strikes_attempted: int | None = None
+    takedowns_landed: int | None = None
+    takedowns_attempted: int | None = None
+    takedowns_pct: float | None = None
+    submission_attempts: int | None = None
+    reversals: int | None = None
+    control_time_seconds: int | None = None
+    sig_strikes_head_landed: int | None = None
+    sig_strikes_head_attempted: int | None = None
+    sig_strikes_body_landed: int | None = None
+    sig_strikes_body_attempted: int | None = None
+    sig_strikes_leg_landed: int | None = None
+    sig_strikes_leg_attempted: int | None = None
+    sig_strikes_distance_landed: int | None = None
+    sig_strikes_distance_attempted: int | None = None
+    sig_strikes_clinch_landed: int | None = None
+    sig_strikes_clinch_attempted: int | None = None
+    sig_strikes_ground_landed: int | None = None
+    sig_strikes_ground_attempted: int | None = None
+
+    def values(self, prefix=''):
+        """Return the parsed (non-None) stats as a dict, keys prefixed with `prefix`."""
+        return {prefix + name: getattr(self, name) for name in STAT_FIELDS if getattr(self, name) is not None}
+
+
+@dataclass(slots=True)
+class RoundStatRecord:
+    """Both fighters' stats for one round."""
+    round_number: int
+    fighter1: StatLine = field(default_factory=StatLine)
+    fighter2: StatLine = field(default_factory=StatLine)
+
+
+@dataclass(slots=True)
+class FightRecord:
+    """A fight, from an event card row and/or its fight-details page.
+
+    Rows on an event page fill in the card columns; the fight-details page
+    fills in the rest. `winner` is the winning corner (1 or 2), if any.
+    """
+    url: str
+    fighter1_url: str | None = None
+    fighter2_url: str | None = None
+    fighter1_name: str | None = None
+    fighter2_name: str | None = None
+    # Event card row
+    weight_class: str | None = None
+    method: str | None = None
+    end_round: int | None = None
+    end_time: str | None = None
+    scheduled_rounds: int | None = None
+    # Fight-details page
+    referee: str | None = None
+    finish_details: str | None = None
+    is_title_fight: bool | None = None
+    winner: int | None = None
+    fighter1: StatLine | None = None
+    fighter2: StatLine | None = None
+    rounds: list = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class EventRecord:
+    """An event page: the event itself plus one FightRecord per card row."""
+    url: str
+    event_name: str
+    event_date: object # datetime.date
+    location: str | None = None
+    fights: list = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class FighterRecord:
+    """A fighter page. Field names match the Fighter columns.
+
+    `history` holds (opponent_url, event_url, event_date) for each row of the
+    fight-history table; any of them may be None.
+    """
+    url: str
+    first_name: str
+    last_name: str
+    nickname: str | None = None
+    height: int | None = None
+    reach: float | None = None
+    weight: float | None = None
+    stance: str | None = None
+    DOB: object = None # datetime.date
+    age: int | None = None
+    wins: int = 0
+    losses: int = 0
+    draws: int = 0
+    no_contests: int = 0
+    SLpM: float | None = None
+    Str_Acc: float | None = None
+    SApM: float | None = None
+    Str_Def: float | None = None
+    Takedown_Avg: float | None = None
+    Takedown_Acc: float | None = None
+    Takedown_Def: float | None = None
+    Sub_Avg: float | None = None
+    history: list = field(default_factory=list)
+
+    def values(self):
+        """Return the Fighter column values as a dict."""
+        return {f.name: getattr(self, f.name) for f in fields(self) if f.name not in ('url', 'history')}
+
+
+# --- Soup construction ---
+
+def page_parts(classes, names=()):
+    """SoupStrainer keeping tags named in names or carrying any of classes, with their whole subtree.
+
+    While the tree is being built the strainer sees the raw class attribute
+    ("a b c"), so a plain class_ filter would miss tags with several classes.
+    """
+    classes = set(classes)
+
+    def matches(name, attrs):
+        if name in names:
+            return True
+        value = attrs.get('class') or ''
+        return not classes.isdisjoint(value.split() if isinstance(value, str) else value)
+    return SoupStrainer(matches)
+
+# Only the parts of each page the parsers read are built into the soup; the header, nav,
+# footer and scripts are skipped.
+EVENT_PAGE_PARTS = page_parts(['b-content__title', 'b-list__box-list', 'b-fight-details__table'])
+FIGHTER_PAGE_PARTS = page_parts(['b-content__title', 'b-content__Nickname', 'b-list__info-box', 'b-fight-details__table'])
+FIGHTER_HISTORY_PARTS = page_parts(['b-fight-details__table'])
+# The Significant Strikes totals table has no class and sits between the stat sections
+FIGHT_PAGE_PARTS = page_parts(['b-fight-details', 'b-fight-details__section'], names=('table',))
+
+_html_parser = None
+
+def html_parser():
+    """The BeautifulSoup tree builder to parse with: SCRAPER_HTML_PARSER, or html.parser if that is not installed."""
+    global _html_parser
+    if _html_parser is None:
+        _html_parser = Config.SCRAPER_HTML_PARSER
+        if builder_registry.lookup(_html_parser) is None:
+            print(f"WARNING: HTML parser '{_html_parser}' is not available; falling back to html.parser.")
+            _html_parser = 'html.parser'
+    return _html_parser
+
+def make_soup(content, parse_only=None):
+    """Build a BeautifulSoup tree for a page with the configured parser, optionally limited by a SoupStrainer."""
+    return BeautifulSoup(content, html_parser(), parse_only=parse_only)
+
+
+# --- Change detection ---
+
+# Every page's data sits in this section; the header, nav, footer and scripts around it
+# (analytics snippet, asset links) can change while the data does not
+_CONTENT_START = b'b-statistics__section_details'
+_CONTENT_END = b'<footer'
+
+def content_hash(content):
+    """SHA-256 hex digest of a page's content section, the part the parsers read.
+
+    Cheap next to parsing, so a page whose hash matches the one stored with its
+    row can skip both parsing and the write. Pages without the section markers
+    are hashed whole.
+    """
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    start = content.find(_CONTENT_START)
+    end = content.rfind(_CONTENT_END)
+    if start == -1 or end < start:
+        start, end = 0, len(content)
+    return hashlib.sha256(memoryview(content)[start:end]).hexdigest()
+
+
+# --- Event pages ---
+
+def parse_event_page(content, event_url=None):
+    """Parse an event page into an EventRecord, or None if its name or date is missing."""
+    soup = make_soup(content, EVENT_PAGE_PARTS)
+
+    # Extract event details with checks
+    event_name_elem = soup.select_one('h2.b-content__title span.b-content__title-highlight')
+    if event_name_elem:
+        event_name = event_name_elem.text.strip()
+        print(f"Found event name: {event_name}")
+    else:
+        # Fallback if the specific span isn't found
+        event_name_elem = soup.select_one('h2.b-content__title')
+        if event_name_elem:
+             event_name = event_name_elem.text.strip()
+             print(f"Found event name (fallback selector): {event_name}")
+        else:
+            print(f"ERROR: Could not find event name element for URL: {event_url}")
+            return None
+
+    # Extract Date and Location more robustly
+    event_details_list = soup.select('ul.b-list__box-list li.b-list__box-list-item')
+    event_date_str = None
+    location = None
+    print(f"Found {len(event_details_list)} detail list items. Looking for Date and Location...")
+    for item in event_details_list:
+        # Get all text within the list item, separated by spaces
+        text_content = item.get_text(separator=" ", strip=True)
+        if text_content.startswith("Date:"):
+            event_date_str = text_content.replace("Date:", "").strip()
+            print(f"Found date string: '{event_date_str}'")
+        elif text_content.startswith("Location:"):
+            location = text_content.replace("Location:", "").strip()
+            print(f"Found location: '{location}'")
+
+    if not event_date_str:
+        print(f"ERROR: Could not find event date string for URL: {event_url}")
+        return None
+    if not location:
+        # Decide if location is critical. If not, you might want to continue.
+        print(f"WARNING: Could not find location string for URL: {event_url}")
+
+    # Parse date
+    try:
+        # Handle potential extra text around the date if necessary
+        clean_date_str = event_date_str.split(u'\\n')[0].strip()
+        event_date = datetime.strptime(clean_date_str, '%B %d, %Y').date()
+        print(f"Parsed event date: {event_date}")
+    except ValueError as date_err:
+        print(f"ERROR: Could not parse date string '{event_date_str}' (cleaned: '{clean_date_str}'): {date_err}")
+        return None
+
+    record = EventRecord(url=event_url, event_name=event_name, event_date=event_date, location=location)
+
+    # --- Fight Extraction ---
+    fight_rows = soup.select('tr.b-fight-details__table-row[data-link]')
+    print(f"Found {len(fight_rows)} fight rows using selector 'tr.b-fight-details__table-row[data-link]'.")
+
+    if not fight_rows:
+         print("WARNING: No fight rows found with data-link selector. Trying fallback 'tbody.b-fight-details__table-body tr'.")
+         fight_rows = soup.select('tbody.b-fight-details__table-body tr')
+         fight_rows = [row for row in fight_rows if row.select_one('td.b-fight-details__table-col')]
+         print(f"Found {len(fight_rows)} rows using fallback selector (after filtering).")
+
+    for i, row in enumerate(fight_rows):
+        print(f"\n--- Processing Fight Row {i+1} ---")
+        fight = parse_card_row(row)
+        if fight:
+            record.fights.append(fight)
+    return record
+
+
+def parse_card_row(row):
+    """Parse one fight row of an event card into a FightRecord, or None if it has no usable links."""
+    fight_details_url = row.get('data-link')
+    if not fight_details_url:
+         link_tag = row.select_one('td a')
+         if link_tag and 'fight-details' in link_tag.get('href', ''):
+             fight_details_url = link_tag['href']
+             print(f"Found fight details URL in 'a' tag: {fight_details_url}")
+         else:
+            print("Skipping row: Could not find data-link attribute or fight details link.")
+            return None
+
+    fighter_links = row.select('td:nth-of-type(2) p a')
+    if len(fighter_links) < 2:
+        print(f"Skipping fight row: Found {len(fighter_links)} fighter links in the second column, expected 2.")
+        return None
+
+    fight = FightRecord(url=fight_details_url,
+                        fighter1_url=fighter_links[0]['href'], fighter2_url=fighter_links[1]['href'],
+                        fighter1_name=fighter_links[0].text.strip(), fighter2_name=fighter_links[1].text.strip())
+    print(f"Processing fight: {fight.fighter1_name} vs {fight.fighter2_name}")
+    print(f"  Fighter 1 URL: {fight.fighter1_url}")
+    print(f"  Fighter 2 URL: {fight.fighter2_url}")
+    print(f"  Fight Details URL: {fight_details_url}")
+
+    columns = row.select('td.b-fight-details__table-col')
+    def get_col_text(idx):
+        if len(columns) > idx and columns[idx]:
+            return columns[idx].text.strip()
+        return None
+
+    fight.weight_class = get_col_text(6)
+    fight.method = get_col_text(7)
+    end_round_str = get_col_text(8)
+    fight.end_time = get_col_text(9)
+    scheduled_rounds_str = get_col_text(11)
+
+    print(f"  Weight: {fight.weight_class}, Method: {fight.method}, Round: {end_round_str}, Time: {fight.end_time}, Scheduled: {scheduled_rounds_str}")
+
+    fight.end_round = int(end_round_str) if end_round_str and end_round_str.isdigit() else None
+    fight.scheduled_rounds = int(scheduled_rounds_str) if scheduled_rounds_str and scheduled_rounds_str.isdigit() else 3
+    return fight
+
+
+def card_page_urls(event_record):
+    """Collect the fighter and fight-details URLs linked from an event's fight rows."""
+    urls = []
+    for fight in event_record.fights:
+        for url in (fight.fighter1_url, fight.fighter2_url, fight.url):
+            if url not in urls:
+                urls.append(url)
+    return urls
+
+
+# --- Fighter pages ---
+
+def parse_fighter_page(content, fighter_url=None):
+    """Parse a fighter page into a FighterRecord, or None if the fighter's name is missing."""
+    soup = make_soup(content, FIGHTER_PAGE_PARTS)
+
+    # Extract name - this is the minimum we need
+    name_elem = soup.select_one('span.b-content__title-highlight')
+    if not name_elem:
+        print(f"ERROR: Could not find name element for fighter: {fighter_url}")
+        return None
+
+    name_text = name_elem.text.strip()
+    print(f"Found fighter name: {name_text}")
+
+    # Parse name into first and last name
+    first_name = "Unknown"
+    last_name = "Unknown"
+    name_parts = name_text.split()
+    if len(name_parts) >= 1:
+        first_name = name_parts[0]
+    if len(name_parts) >= 2:
+        last_name = ' '.join(name_parts[1:])
+
+    record = FighterRecord(url=fighter_url, first_name=first_name, last_name=last_name)
+
+    # Extract nickname safely
+    nickname_elem = soup.select_one('p.b-content__Nickname')
+    record.nickname = nickname_elem.text.strip('" ') if nickname_elem else None
+    print(f"Found nickname: {record.nickname}")
+
+    # Extract basic stats first (height, weight, reach, stance, etc.)
+    stats = {}
+
+    # First, try to find the basic stats in the small-width info box
+    basic_stats_container = soup.select_one('div.b-list__info-box_style_small-width')
+    if basic_stats_container:
+        print(f"Container HTML class: {basic_stats_container.get('class')}")
+
+        # Debug the entire container HTML for troubleshooting
+        container_html = str(basic_stats_container)
+        print(f"Container HTML (first 100 chars): {container_html[:100]}...")
+
+        # Try multiple selectors to find the list items
+        stat_items = basic_stats_container.select('li.b-list__box-list-item')
+        if not stat_items:
+            stat_items = basic_stats_container.select('li')
+            print(f"Fallback to generic li selector, found {len(stat_items)} items")
+
+        print(f"Found {len(stat_items)} basic stat list items in container")
+
+        for idx, item in enumerate(stat_items):
+            print(f"Processing item #{idx+1}: {item.get_text(strip=True)[:30]}...")
+
+            # Try different selectors for the label element
+            label_elem = None
+            for selector in ['i.b-list__box-item-title', '.b-list__box-item-title', 'i.b-list__box-item-title_type_width']:
+                label_elem = item.select_one(selector)
+                if label_elem:
+                    print(f"  Found label using selector: {selector}")
+                    break
+
+            if label_elem:
+                label = label_elem.text.strip(':').strip()
+                # Get the text after the label
+                value_text = item.get_text(strip=True).replace(label_elem.get_text(strip=True), '', 1).strip()
+                stats[label] = value_text
+            else:
+                print(f"  No label element found for item: {item}")
+    else:
+        # Fallback to searching through all list items
+        print("Basic stats container not found, trying generic list items")
+        stat_items = soup.select('li.b-list__box-list-item')
+        print(f"Found {len(stat_items)} potential basic stat list items")
+
+        for item in stat_items:
+            label_elem = item.select_one('.b-list__box-item-title')
+            if label_elem and ('Height' in label_elem.text or 'Weight' in label_elem.text or
+                              'Reach' in label_elem.text or 'STANCE' in label_elem.text or
+                              'DOB' in label_elem.text):
+                label = label_elem.text.strip(':').strip()
+                value_text = item.get_text(strip=True).replace(label_elem.get_text(strip=True), '', 1).strip()
+                stats[label] = value_text
+
+    print(f"Extracted basic stats: {stats}")
+
+    # Normalize keys to handle possible case differences and remove colons
+    normalized_stats = {}
+    for key, value in stats.items():
+        clean_key = key.strip(':').strip().upper()
+        if clean_key == 'HEIGHT':
+            normalized_stats['Height'] = value
+        elif clean_key == 'WEIGHT':
+            normalized_stats['Weight'] = value
+        elif clean_key == 'REACH':
+            normalized_stats['Reach'] = value
+        elif clean_key == 'STANCE':
+            normalized_stats['STANCE'] = value
+        elif clean_key == 'DOB':
+             normalized_stats['DOB'] = value
+
+    stats = normalized_stats # Replace original stats dict with normalized one
+    print(f"Stats after normalization: {stats}")
+
+    career_stats = parse_career_stats(soup)
+
+    # Extract record safely
+    record_text = ""
+    record_elem = soup.select_one('span.b-content__title-record')
+    if record_elem:
+        record_text = record_elem.text.strip()
+
+    record_match = re.search(r'Record: (\d+)-(\d+)-(\d+)(?:\s+\((\d+) NC\))?', record_text)
+    if record_match:
+        record.wins = int(record_match.group(1))
+        record.losses = int(record_match.group(2))
+        record.draws = int(record_match.group(3))
+        record.no_contests = int(record_match.group(4)) if record_match.group(4) else 0
+
+    # Parse height safely - Use normalized 'stats' dictionary
+    height_str = stats.get('Height')
+    if height_str:
+        try:
+            if "'" in height_str and '"' in height_str:
+                # Format: 5' 11"
+                feet, inches = height_str.split("'")
+                inches = inches.strip('" ')
+                record.height = int(feet.strip()) * 12 + int(inches)
+            elif "cm" in height_str:
+                # Format: 180 cm
+                cm_value = float(height_str.replace("cm", "").strip())
+                record.height = round(cm_value / 2.54)  # Convert cm to inches
+            elif height_str.isdigit():
+                # Just a number, assume inches
+                record.height = int(height_str)
+        except (ValueError, TypeError) as e:
+            print(f"Could not parse height '{height_str}': {e}")
+
+    # Parse weight safely - Use normalized 'stats' dictionary
+    weight_str = stats.get('Weight')
+    if weight_str:
+        try:
+            if 'lbs.' in weight_str or 'lbs' in weight_str:
+                # Format: 145 lbs.
+                weight_parts = weight_str.split()
+                record.weight = float(weight_parts[0])
+            elif 'kg' in weight_str:
+                # Format: 65.8 kg
+                kg_value = float(weight_str.replace("kg", "").strip())
+                record.weight = round(kg_value * 2.20462, 1)  # Convert kg to lbs
+            elif weight_str.replace('.', '', 1).isdigit():
+                # Just a number, assume lbs
+                record.weight = float(weight_str)
+        except (ValueError, TypeError) as e:
+            print(f"Could not parse weight '{weight_str}': {e}")
+
+    # Parse reach safely - Use normalized 'stats' dictionary
+    reach_str = stats.get('Reach')
+    if reach_str:
+        try:
+            if '"' in reach_str:
+                # Format: 72"
+                record.reach = float(reach_str.strip('" '))
+            elif "cm" in reach_str:
+                # Format: 183 cm
+                cm_value = float(reach_str.replace("cm", "").strip())
+                record.reach = round(cm_value / 2.54, 1)  # Convert cm to inches
+            elif reach_str.replace('.', '', 1).isdigit():
+                # Just a number, assume inches
+                record.reach = float(reach_str)
+        except (ValueError, TypeError) as e:
+            print(f"Could not parse reach '{reach_str}': {e}")
+
+    # Get stance - Use normalized 'stats' dictionary
+    record.stance = stats.get('STANCE')
+
+    # Parse DOB safely - Use normalized 'stats' dictionary
+    if 'DOB' in stats: # Now uses 'DOB' key
+        dob_str = stats['DOB']
+        try:
+            dob = datetime.strptime(dob_str, '%b %d, %Y').date()
+            today = datetime.now().date()
+            record.DOB = dob
+            record.age = today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
+        except (ValueError, TypeError) as e:
+            print(f"Could not parse DOB '{dob_str}': {e}")
+    else:
+         print("DOB key not found in normalized stats.")
+
+    record.SLpM = career_stats.get('SLpM')
+    record.Str_Acc = career_stats.get('Str. Acc.')
+    record.SApM = career_stats.get('SApM')
+    # Handle potential variations in Str. Def key from scraping
+    record.Str_Def = career_stats.get('Str. Def') or career_stats.get('Str. Def.')
+    record.Takedown_Avg = career_stats.get('TD Avg.')
+    record.Takedown_Acc = career_stats.get('TD Acc.')
+    record.Takedown_Def = career_stats.get('TD Def.')
+    record.Sub_Avg = career_stats.get('Sub. Avg.')
+
+    # Event/opponent links from the fight history, for the crawl queue
+    record.history = parse_fight_history(soup)
+
+    return record
+
+
+def parse_fighter_history(content):
+    """Parse only the fight-history links of a fighter page (for pages that are not otherwise parsed)."""
+    return parse_fight_history(make_soup(content, FIGHTER_HISTORY_PARTS))
+
+
+def parse_fight_history(soup):
+    """(opponent_url, event_url, event_date) for each row of a fighter's fight-history table."""
+    history = []
+    try:
+        fight_history_rows = soup.select('tbody.b-fight-details__table-body tr')
+        for row in fight_history_rows:
+            opponent_link = row.select_one('td:nth-of-type(2) a')
+            event_link = row.select_one('td:nth-of-type(7) a')
+            history.append((
+                opponent_link['href'] if opponent_link else None,
+                event_link['href'] if event_link else None,
+                # The event's date lets the frontier schedule recent cards first
+                parse_history_event_date(row) if event_link else None,
+            ))
+    except Exception as e:
+        print(f"Error processing fight history: {e}")
+        # Non-critical error, continue
+    return history
+
+
+def parse_career_stats(soup):
+    """Return the career averages box of a fighter page as {label: float}."""
+    career_stats = {}
+    print("Attempting to extract career stats...")
+
+    # Find all lowercase title elements and check their text content
+    print("Attempting targeted stat extraction...")
+
+    # Get all stats elements with the lowercase class
+    stat_elems = soup.select('i.b-list__box-item-title_font_lowercase')
+    print(f"Found {len(stat_elems)} potential stat elements with lowercase class")
+
+    # Map of stat labels to their corresponding model field keys
+    stat_mapping = {
+        'SLpM': 'SLpM',
+        'Str. Acc.': 'Str. Acc.',
+        'SApM': 'SApM',
+        'Str. Def': 'Str. Def',
+        'TD Avg.': 'TD Avg.',
+        'TD Acc.': 'TD Acc.',
+        'TD Def.': 'TD Def.',
+        'Sub. Avg.': 'Sub. Avg.'
+    }
+
+    # Process each stat element
+    for elem in stat_elems:
+        raw_label = elem.get_text(strip=True)
+        clean_label = raw_label.strip(':')
+
+        # Check if this is a stat we're interested in
+        for target_label, target_key in stat_mapping.items():
+            if clean_label == target_label:
+                # Found a relevant stat, get its value
+                parent_li = elem.find_parent('li')
+                if parent_li:
+                    value_text = parent_li.get_text(strip=True).replace(raw_label, '', 1).strip()
+
+                    try:
+                        # Parse percentage values
+                        if '%' in value_text:
+                            parsed_value = float(value_text.strip('%')) / 100.0
+                            career_stats[target_key] = parsed_value
+                        else:
+                            parsed_value = float(value_text)
+                            career_stats[target_key] = parsed_value
+                    except ValueError:
+                        print(f"  Could not parse {target_key}: {value_text}")
+                break
+
+    # Fallback: If we couldn't find some stats, try looking through all list items
+    if len(career_stats) < len(stat_mapping):
+        print("Some stats missing, trying fallback extraction...")
+
+        # Get all list items that might contain stats
+        all_list_items = soup.select('li.b-list__box-list-item')
+        for item in all_list_items:
+            label_elem = item.select_one('i.b-list__box-item-title')
+            if label_elem:
+                raw_label = label_elem.get_text(strip=True)
+                clean_label = raw_label.strip(':')
+
+                # Check if this is a stat we're interested in and don't already have
+                for target_label, target_key in stat_mapping.items():
+                    if clean_label == target_label and target_key not in career_stats:
+                        value_text = item.get_text(strip=True).replace(raw_label, '', 1).strip()
+                        print(f"Fallback found: {clean_label} = {value_text}")
+
+                        try:
+                            # Parse percentage values
+                            if '%' in value_text:
+                                parsed_value = float(value_text.strip('%')) / 100.0
+                                career_stats[target_key] = parsed_value
+                                print(f"  Fallback parsed: {target_key} = {parsed_value}")
+                            else:
+                                parsed_value = float(value_text)
+                                career_stats[target_key] = parsed_value
+                                print(f"  Fallback parsed: {target_key} = {parsed_value}")
+                        except ValueError:
+                            print(f"  Could not parse fallback {target_key}: {value_text}")
+                        break
+
+    print(f"Extracted career stats: {career_stats}")
+    return career_stats
+
+
+def parse_history_event_date(row):
+    """Parse the event date (e.g. 'Jun. 29, 2024') from a fighter's fight-history row."""
+    date_tags = row.select('td:nth-of-type(7) p')
+    if len(date_tags) < 2:
+        return None
+    date_text = date_tags[1].get_text(strip=True).replace('.', '').replace('Sept', 'Sep')
+    for fmt in ('%b %d, %Y', '%B %d, %Y'):
+        try:
+            return datetime.strptime(date_text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_full_name(full_name):
+    """Parses a full name into first and last name."""
+    parts = full_name.strip().split()
+    if not parts:
+        return None, None
+    first_name = parts[0]
+    last_name = " ".join(parts[1:]) if len(parts) > 1 else None
+    # Handle potential missing last name for single-named fighters if necessary
+    if not last_name:
+        # Decide on handling: maybe last_name = first_name, or log a warning
+        print(f"Warning: Only one name part found for '{full_name}'. Using '{first_name}' as first name.")
+        # last_name = first_name # Option: Treat single name as first and last
+    return first_name, last_name
+
+
+# --- Fight-details pages ---
+
+def parse_fight_page(content, fight_details_url=None):
+    """Parse a fight-details page into a FightRecord, or None if the two fighters are not found."""
+    soup = make_soup(content, FIGHT_PAGE_PARTS)
+
+    # --- Extract Fighter Names from Page ---
+    fighter_name_elements = soup.select('a.b-fight-details__person-link')
+
+    if len(fighter_name_elements) < 2:
+        # Adding more debug info here: print the number found
+        print(f"ERROR: Found only {len(fighter_name_elements)} fighter name links (expected 2) using selector 'a.b-fight-details__person-link' on page: {fight_details_url}. Skipping detail scrape.")
+        return None
+    # Make sure we only take the first two, in case the selector matches other similar links elsewhere
+    fighter_name_elements = fighter_name_elements[:2]
+
+    record = FightRecord(url=fight_details_url,
+                         fighter1_url=fighter_name_elements[0].get('href'),
+                         fighter2_url=fighter_name_elements[1].get('href'),
+                         fighter1_name=fighter_name_elements[0].text.strip(),
+                         fighter2_name=fighter_name_elements[1].text.strip())
+    print(f"Found names on page: '{record.fighter1_name}' vs '{record.fighter2_name}'")
+
+    print("Extracting fight-level details...")
+    details_section = soup.select_one('div.b-fight-details__content')
+
+    if details_section:
+        # --- Referee Extraction (Revised) ---
+        # Find the <i> tag containing the "Referee:" label
+        referee_label_i = details_section.find('i', class_='b-fight-details__label', string=re.compile(r'\s*Referee:\s*'))
+        if referee_label_i:
+            # Find the nearest following <span> tag, which should contain the name
+            referee_span = referee_label_i.find_next('span')
+            if referee_span:
+                record.referee = referee_span.text.strip()
+            else:
+                # Fallback: Try getting text from parent <p> and isolating (less reliable)
+                referee_parent_p = referee_label_i.find_parent('p', class_='b-fight-details__text')
+                if referee_parent_p:
+                     full_text = referee_parent_p.get_text(separator=' ', strip=True)
+                     # Try to extract text after "Referee:"
+                     match = re.search(r'Referee:\s*(.*)', full_text, re.IGNORECASE)
+                     if match:
+                         potential_ref = match.group(1).strip()
+                         # Avoid grabbing other fields if regex is too broad
+                         if 'Details:' not in potential_ref and 'Method:' not in potential_ref:
+                             record.referee = potential_ref
+        else:
+            print("DEBUG: Referee label <i> not found.")
+
+        # --- Finish Details Extraction (Revised) ---
+        # Find the <i> tag containing the "Details:" label
+        details_label_i = details_section.find('i', class_='b-fight-details__label', string=re.compile(r'\s*Details:\s*'))
+        if details_label_i:
+            # Get the parent <p> tag
+            details_parent_p = details_label_i.find_parent('p', class_='b-fight-details__text')
+            if details_parent_p:
+                 # Get all text within the <p>, stripping extra whitespace
+                 full_details_text = details_parent_p.get_text(separator=' ', strip=True)
+                 # Remove the "Details:" label itself
+                 finish_details_text = full_details_text.replace('Details:', '').strip()
+                 # Optional: Clean up potential multiple spaces if get_text adds them
+                 record.finish_details = re.sub(r'\s+', ' ', finish_details_text).strip()
+            else:
+                 print("DEBUG: Parent <p> for Details not found.")
+        else:
+            print("DEBUG: Details label <i> not found.")
+
+        # --- Scheduled Rounds Extraction ---
+        # Find the <i> tag containing the "Time format:" label
+        time_format_label_i = details_section.find('i', class_='b-fight-details__label', string=re.compile(r'\s*Time format:\s*'))
+        if time_format_label_i:
+            # Get the parent <i> tag which contains the label and the value
+            time_format_parent_i = time_format_label_i.find_parent('i', class_='b-fight-details__text-item')
+            if time_format_parent_i:
+                # Extract the text content from the parent
+                full_text = time_format_parent_i.get_text(separator=' ', strip=True)
+                # Use regex to find a number followed by "Rnd"
+                match = re.search(r'(\d+)\s+Rnd', full_text)
+                if match:
+                    try:
+                        # Extract the matched number and convert to integer
+                        record.scheduled_rounds = int(match.group(1))
+                        print(f"DEBUG: Extracted scheduled rounds: {record.scheduled_rounds} from '{full_text}'")
+                    except (ValueError, TypeError):
+                        print(f"ERROR: Could not convert scheduled rounds number to int from '{match.group(1)}'")
+                else:
+                    print(f"DEBUG: Could not find scheduled rounds pattern ('N Rnd') in text: '{full_text}'")
+            else:
+                print("DEBUG: Parent <i> for Time Format not found.")
+        else:
+             print("DEBUG: Time Format label <i> not found.")
+
+    else:
+         print("DEBUG: details_section (div.b-fight-details__content) not found.")
+
+    print(f"  Referee: {record.referee}")
+    print(f"  Finish Details: {record.finish_details}")
+    print(f"  Scheduled Rounds: {record.scheduled_rounds}")
+
+    # Check if it's a title fight
+    title_element = soup.select_one('i.b-fight-details__fight-title')
+    record.is_title_fight = bool(title_element and 'title' in title_element.text.lower())
+    print(f"  Is Title Fight: {record.is_title_fight}")
+
+    # Determine the winning corner
+    winner_elem = soup.select_one('i.b-fight-details__person-status_style_green')
+    if winner_elem:
+        parent_div = winner_elem.find_parent('div', class_='b-fight-details__person')
+        if parent_div:
+            winner_link = parent_div.select_one('a.b-fight-details__person-link')
+            if winner_link:
+                winner_name = winner_link.text.strip()
+                print(f"Found winner name on page: {winner_name}")
+                f1_name = ' '.join(record.fighter1_name.split())
+                f2_name = ' '.join(record.fighter2_name.split())
+                if winner_name.lower() in f1_name.lower() or f1_name.lower() in winner_name.lower():
+                    record.winner = 1
+                elif winner_name.lower() in f2_name.lower() or f2_name.lower() in winner_name.lower():
+                    record.winner = 2
+                else:
+                    print(f"WARN: Winner name '{winner_name}' on page did not match fighters '{f1_name}' or '{f2_name}'")
+    else:
+        print("Winner element not found on page.")
+
+    totals_table, sig_strike_table = find_totals_tables(soup)
+
+    # Determine fighter order from totals table if available
+    col1_is_fighter1 = None
+    if totals_table:
+        col1_is_fighter1 = determine_fighter_order(totals_table, record.fighter1_name)
+
+    record.fighter1, record.fighter2 = StatLine(), StatLine()
+    if totals_table:
+        parse_totals_table(totals_table, record.fighter1, record.fighter2, col1_is_fighter1)
+    if sig_strike_table:
+        parse_significant_strikes_table(sig_strike_table, record.fighter1, record.fighter2, col1_is_fighter1)
+
+    # Now process the round-by-round stats
+    record.rounds = parse_round_stats(soup, col1_is_fighter1)
+    return record
+
+
+def find_totals_tables(soup):
+    """Locate the whole-fight Totals and Significant Strikes tables. Returns (totals, sig_strikes)."""
+    # First find sections that contain the tables we're looking for
+    totals_section = soup.select_one('section.b-fight-details__section p.b-fight-details__collapse-link_tot')
+    sig_strikes_section = soup.select_one('section.b-fight-details__section p.b-fight-details__collapse-link_tot[style*="margin-bottom: 0px"]')
+
+    totals_table = None
+    sig_strike_table = None
+
+    # Find the main totals table - it's the table immediately following the "Totals" section
+    if totals_section:
+        totals_section_parent = totals_section.find_parent('section')
+        if totals_section_parent:
+            # Get the next section that contains a table
+            next_section = totals_section_parent.find_next_sibling('section')
+            if next_section:
+                totals_table = next_section.select_one('table')
+                if totals_table:
+                    print("Found main Totals table based on section heading")
+                else:
+                    print("WARNING: Found Totals section but no table inside next section")
+            else:
+                print("WARNING: Found Totals section but no next section")
+
+    # Find the significant strikes table - it's the table immediately after the "Significant Strikes" section
+    if sig_strikes_section:
+        sig_table = sig_strikes_section.find_parent('section').find_next_sibling('table')
+        if sig_table:
+            sig_strike_table = sig_table
+            print("Found Significant Strikes table based on section heading")
+        else:
+            print("WARNING: Found Significant Strikes section but no table")
+
+    # Fallback to the old method if we couldn't find tables using the section headers
+    if not totals_table or not sig_strike_table:
+        print("Falling back to header-based table identification...")
+        all_tables = soup.select('section table.b-fight-details__table, table') # Select all tables
+
+        print(f"Found {len(all_tables)} tables in the page")
+        for idx, table in enumerate(all_tables):
+            # Skip tables we've already found
+            if table == totals_table or table == sig_strike_table:
+                continue
+
+            # Check if we're in a round-specific section (avoid round tables)
+            parent_row_head = table.find_parent('thead', class_='b-fight-details__table-row_type_head')
+            if parent_row_head and "round" in parent_row_head.text.lower():
+                print(f"Skipping Table {idx} - appears to be round-specific data")
+                continue
+
+            headers = [th.text.strip().lower() for th in table.select('thead th.b-fight-details__table-col')]
+            if not headers:
+                continue
+
+            print(f"Table {idx} headers: {headers}")
+
+            # Identify Totals Table if we still need one
+            if not totals_table:
+                totals_indicators = ['total str.', 'kd', 'sub. att', 'rev.', 'ctrl']
+                totals_matches = sum(1 for indicator in totals_indicators if any(indicator in h for h in headers))
+
+                # Avoid round-specific tables by checking if there's a Round header
+                round_header = any("round" in h.lower() for h in headers)
+                if not round_header and totals_matches >= 3:
+                    print(f"Identified Table {idx} as Totals Table based on {totals_matches} matching headers.")
+                    totals_table = table
+
+            # Identify Significant Strikes Table if we still need one
+            if not sig_strike_table:
+                sig_strike_indicators = ['head', 'body', 'leg', 'distance', 'clinch', 'ground']
+                sig_matches = sum(1 for indicator in sig_strike_indicators if indicator in headers)
+
+                if sig_matches >= 3 and all(ind in headers for ind in ['head', 'body', 'leg']):
+                    print(f"Identified Table {idx} as Significant Strikes Table based on headers.")
+                    sig_strike_table = table
+
+    if not totals_table:
+        print("ERROR: Could not identify the Totals stats table!")
+    if not sig_strike_table:
+        print("WARN: Could not identify the Significant Strikes breakdown table!")
+    return totals_table, sig_strike_table
+
+
+def parse_stat_value(text_value):
+    """Parse a stat cell ("X of Y", "M:SS", "48%", a count or "---").
+
+    Returns (landed, attempted, percentage); any of them may be None.
+    """
+    original_text = text_value # Keep for logging
+    text_value = text_value.strip()
+    if not text_value:
+        return None, None, None
+
+    # Try time format "M:SS" first (more specific)
+    time_match = re.search(r'(\d+):(\d+)', text_value)
+    if time_match:
+        try:
+            minutes = int(time_match.group(1))
+            seconds = int(time_match.group(2))
+            total_seconds = minutes * 60 + seconds
+            return total_seconds, None, None
+        except (ValueError, TypeError, IndexError) as e:
+            print(f"DEBUG parse_stat: Error parsing 'M:SS' from '{original_text}': {e}")
+
+    # Try "X of Y" next
+    parts = re.search(r'(\d+)\s+of\s+(\d+)', text_value)
+    if parts:
+        try:
+            landed = int(parts.group(1))
+            attempted = int(parts.group(2))
+            # Try to get percentage explicitly listed like (Z%)
+            pct_match = re.search(r'\((\d+)%\)', text_value)
+            percentage = float(pct_match.group(1)) / 100.0 if pct_match else None
+            # Calculate if not listed
+            if percentage is None and attempted > 0:
+                percentage = landed / attempted
+            elif percentage is None: # attempts are 0 or parsing failed
+                percentage = 0.0 # Default if attempts are 0
+            return landed, attempted, percentage
+        except (ValueError, TypeError, IndexError) as e:
+             print(f"DEBUG parse_stat: Error parsing 'X of Y' from '{original_text}': {e}")
+             return None, None, None # Error during parsing
+
+    # Try percentage value like "48%"
+    pct_only_match = re.search(r'(\d+)%', text_value)
+    if pct_only_match:
+        try:
+            # Return the number before the %, the assignment logic will divide by 100
+            pct_value = float(pct_only_match.group(1))
+            return pct_value, None, None # Return the number (e.g., 48.0)
+        except (ValueError, TypeError) as e:
+            print(f"DEBUG parse_stat: Error parsing percentage from '{original_text}': {e}")
+
+    # Try just the first number found (for KD, Sub Att, Rev)
+    num_match = re.search(r'(\d+)', text_value) # Find first sequence of digits
+    if num_match:
+        try:
+            value = int(num_match.group(1))
+            return value, None, None # Landed = the number, Attempted=None, Pct=None
+        except (ValueError, TypeError) as e:
+             print(f"DEBUG parse_stat: Error parsing number from '{original_text}': {e}")
+             return None, None, None
+
+    # Special handling for "---" or "--"
+    if text_value in ['---', '--']:
+        return 0, 0, 0.0 # Landed=0, Attempted=0, Pct=0.0 for stats like TD
+
+    # Fallback: Couldn't parse known formats
+    print(f"DEBUG parse_stat: Could not parse known stat format from: '{original_text}'")
+    return None, None, None # Return tuple of Nones if unparseable
+
+
+def determine_fighter_order(table, fighter1_name):
+    """Determine the order of fighters in the table (which one is in first row)"""
+    print("\n--- Determining Fighter Order ---")
+    stat_row = table.select_one('tbody.b-fight-details__table-body tr.b-fight-details__table-row')
+    if not stat_row:
+        print("WARNING: Could not find stats row to determine fighter order")
+        return None
+
+    stat_cells = stat_row.select('td.b-fight-details__table-col')
+    if not stat_cells:
+        print("WARNING: Could not find stat cells to determine fighter order")
+        return None
+
+    # Use the first cell (fighter names)
+    fighter_cell = stat_cells[0]
+    fighter_links = fighter_cell.select('p.b-fight-details__table-text a')
+    if len(fighter_links) >= 2:
+        first_name_in_table = fighter_links[0].text.strip()
+        # Compare whitespace-normalized, the way fighter names are stored
+        col1_is_fighter1 = ' '.join(fighter1_name.split()) in first_name_in_table
+        print(f"Determined fighter order: col1_is_fighter1 = {col1_is_fighter1}")
+        return col1_is_fighter1
+    else:
+        print("ERROR: Could not determine fighter order from table first column.")
+        return None
+
+
+def parse_totals_table(totals_table, fighter1_stats, fighter2_stats, col1_is_fighter1):
+    """Parse the totals table into the two fighters' StatLines"""
+    print("\n--- Processing Totals Table ---")
+    header_cells = totals_table.select('tr.b-fight-details__table-row th.b-fight-details__table-col')
+    if len(header_cells) < 2:
+        print("WARNING: Could not find header cells in totals table")
+        return
+
+    col_to_stat = {}
+    for idx, header in enumerate(header_cells):
+        header_text = header.text.strip().lower()
+        print(f"Found Totals header {idx}: '{header_text}'")
+        col_to_stat[idx] = header_text
+    print(f"Totals Column mapping: {col_to_stat}")
+
+    stat_row = totals_table.select_one('tbody.b-fight-details__table-body tr.b-fight-details__table-row')
+    if not stat_row:
+        print("WARNING: Could not find stats row in totals table")
+        return
+
+    stat_cells = stat_row.select('td.b-fight-details__table-col')
+    if len(stat_cells) < len(header_cells): # Check length consistency
+        print(f"WARNING: Totals table header count ({len(header_cells)}) doesn't match data cell count ({len(stat_cells)})")
+        return
+
+    if col1_is_fighter1 is None: # Proceed only if order is determined
+        print("ERROR: Fighter order not determined for totals table")
+        return
+
+    f1, f2 = fighter1_stats, fighter2_stats
+    # Process each stat column (index matches header index)
+    for col_idx, cell in enumerate(stat_cells):
+        if col_idx not in col_to_stat or col_to_stat[col_idx] == 'fighter':
+            continue # Skip fighter column or unmapped columns
+
+        p_tags = cell.find_all('p', class_='b-fight-details__table-text')
+        if len(p_tags) < 2:
+            print(f"WARNING: Totals Column {col_idx} ('{col_to_stat.get(col_idx)}') has fewer than 2 p tags")
+            continue
+
+        val1_raw = p_tags[0].text.strip()
+        val2_raw = p_tags[1].text.strip()
+
+        landed1, attempted1, pct1 = parse_stat_value(val1_raw)
+        landed2, attempted2, pct2 = parse_stat_value(val2_raw)
+
+        f1_landed, f1_attempted, f1_pct = (landed1, attempted1, pct1) if col1_is_fighter1 else (landed2, attempted2, pct2)
+        f2_landed, f2_attempted, f2_pct = (landed2, attempted2, pct2) if col1_is_fighter1 else (landed1, attempted1, pct1)
+
+        stat_name = col_to_stat[col_idx]
+        print(f"  Processing Totals column: '{stat_name}' | F1: '{val1_raw if col1_is_fighter1 else val2_raw}' | F2: '{val2_raw if col1_is_fighter1 else val1_raw}'")
+
+        # --- Assignment Logic for Totals Table ---
+        if "kd" in stat_name:
+            if f1_landed is not None: f1.knockdowns = f1_landed
+            if f2_landed is not None: f2.knockdowns = f2_landed
+        elif "sig. str." == stat_name: # Exact match for "Sig. str." (Landed/Attempted)
+            if f1_landed is not None: f1.sig_strikes_landed = f1_landed
+            if f1_attempted is not None: f1.sig_strikes_attempted = f1_attempted
+            if f2_landed is not None: f2.sig_strikes_landed = f2_landed
+            if f2_attempted is not None: f2.sig_strikes_attempted = f2_attempted
+        elif "sig. str. %" == stat_name: # Exact match for "Sig. str. %"
+            if f1_landed is not None: f1.sig_strikes_pct = f1_landed / 100.0 # Comes as number like 48.0
+            if f2_landed is not None: f2.sig_strikes_pct = f2_landed / 100.0
+        elif "total str." == stat_name: # Exact match for "Total str."
+            if f1_landed is not None: f1.total_strikes_landed = f1_landed
+            if f1_attempted is not None: f1.total_strikes_attempted = f1_attempted
+            if f2_landed is not None: f2.total_strikes_landed = f2_landed
+            if f2_attempted is not None: f2.total_strikes_attempted = f2_attempted
+        elif "td" in stat_name and len(stat_name) <= 5: # More flexible match for any "td" or "td %" related column
+            # Handle the takedown landed/attempted stat (typically just "td")
+            if "%" not in stat_name and f1_landed is not None:
+                f1.takedowns_landed = f1_landed
+                if f1_attempted is not None: f1.takedowns_attempted = f1_attempted
+                if f2_landed is not None: f2.takedowns_landed = f2_landed
+                if f2_attempted is not None: f2.takedowns_attempted = f2_attempted
+
+                # Calculate percentage here as primary source
+                if f1_attempted is not None and f1_attempted > 0:
+                    f1.takedowns_pct = (f1_landed or 0) / f1_attempted
+                    print(f"  Calculated fighter1_takedowns_pct: {f1.takedowns_pct}")
+                else:
+                    f1.takedowns_pct = 0.0
+                    print(f"  Setting fighter1_takedowns_pct to 0.0")
+                if f2_attempted is not None and f2_attempted > 0:
+                    f2.takedowns_pct = (f2_landed or 0) / f2_attempted
+                    print(f"  Calculated fighter2_takedowns_pct: {f2.takedowns_pct}")
+                else:
+                    f2.takedowns_pct = 0.0
+                    print(f"  Setting fighter2_takedowns_pct to 0.0")
+            # Handle the takedown percentage stat (typically "td %")
+            elif "%" in stat_name:
+                # Only use this if calculation above didn't happen (e.g., TD column missing)
+                if f1.takedowns_pct is None:
+                    if f1_landed is not None: f1.takedowns_pct = f1_landed / 100.0
+                    print(f"  Set fighter1_takedowns_pct from TD% col: {f1.takedowns_pct}")
+                if f2.takedowns_pct is None:
+                    if f2_landed is not None: f2.takedowns_pct = f2_landed / 100.0
+                    print(f"  Set fighter2_takedowns_pct from TD% col: {f2.takedowns_pct}")
+        elif "sub. att" in stat_name: # Fuzzy match ok here
+            if f1_landed is not None: f1.submission_attempts = f1_landed
+            if f2_landed is not None: f2.submission_attempts = f2_landed
+        elif "rev." in stat_name: # Fuzzy match ok here
+            if f1_landed is not None: f1.reversals = f1_landed
+            if f2_landed is not None: f2.reversals = f2_landed
+        elif "ctrl" in stat_name: # Fuzzy match ok here (Control Time)
+            if f1_landed is not None: f1.control_time_seconds = f1_landed
+            if f2_landed is not None: f2.control_time_seconds = f2_landed
+        else:
+            print(f"  Unknown or unhandled stat type in Totals: '{stat_name}'")
+
+
+def parse_significant_strikes_table(sig_strike_table, fighter1_stats, fighter2_stats, col1_is_fighter1):
+    """Parse the significant strikes table into the two fighters' StatLines"""
+    print("\n--- Processing Significant Strikes Table ---")
+    if col1_is_fighter1 is None:
+        print("ERROR: Cannot process Sig Strikes table because fighter order was not determined")
+        return
+
+    header_cells_sig = sig_strike_table.select('tr.b-fight-details__table-row th.b-fight-details__table-col')
+    col_to_breakdown = {}
+    for idx, header in enumerate(header_cells_sig):
+        header_text = header.text.strip().lower()
+        print(f"Found Sig Strike header {idx}: '{header_text}'")
+        col_to_breakdown[idx] = header_text
+    print(f"Breakdown column mapping: {col_to_breakdown}")
+
+    breakdown_row = sig_strike_table.select_one('tbody.b-fight-details__table-body tr.b-fight-details__table-row')
+    if not breakdown_row:
+        print("WARNING: Could not find breakdown stats row in Significant Strikes table")
+        return
+
+    breakdown_cells = breakdown_row.select('td.b-fight-details__table-col')
+    if len(breakdown_cells) < len(header_cells_sig):
+        print(f"WARNING: Sig Strike table header count ({len(header_cells_sig)}) doesn't match data cell count ({len(breakdown_cells)})")
+        return
+
+    # Process each breakdown column (index matches header index)
+    for col_idx, cell in enumerate(breakdown_cells):
+        if col_idx not in col_to_breakdown or col_to_breakdown[col_idx] == 'fighter':
+            continue # Skip fighter column or unmapped columns
+
+        p_tags = cell.find_all('p', class_='b-fight-details__table-text')
+        if len(p_tags) < 2:
+            print(f"WARNING: Sig Strike Column {col_idx} ('{col_to_breakdown.get(col_idx)}') has fewer than 2 p tags")
+            continue
+
+        val1_raw = p_tags[0].text.strip()
+        val2_raw = p_tags[1].text.strip()
+
+        landed1, attempted1, _ = parse_stat_value(val1_raw)
+        landed2, attempted2, _ = parse_stat_value(val2_raw)
+
+        f1_landed, f1_attempted = (landed1, attempted1) if col1_is_fighter1 else (landed2, attempted2)
+        f2_landed, f2_attempted = (landed2, attempted2) if col1_is_fighter1 else (landed1, attempted1)
+
+        breakdown_type = col_to_breakdown[col_idx]
+        print(f"  Processing breakdown: '{breakdown_type}' | F1: '{val1_raw if col1_is_fighter1 else val2_raw}' | F2: '{val2_raw if col1_is_fighter1 else val1_raw}'")
+
+        # --- Assignment Logic for Significant Strikes Table ---
+        if breakdown_type in ('head', 'body', 'leg', 'distance', 'clinch', 'ground'):
+            landed_field = f'sig_strikes_{breakdown_type}_landed'
+            attempted_field = f'sig_strikes_{breakdown_type}_attempted'
+            if f1_landed is not None: setattr(fighter1_stats, landed_field, f1_landed)
+            if f1_attempted is not None: setattr(fighter1_stats, attempted_field, f1_attempted)
+            if f2_landed is not None: setattr(fighter2_stats, landed_field, f2_landed)
+            if f2_attempted is not None: setattr(fighter2_stats, attempted_field, f2_attempted)
+        # Note: The Sig Strike totals ('sig. str.' and 'sig. str. %') are usually in the *Totals* table,
+        # not in this breakdown table. But for consistency we should handle them here too just in case.
+        elif "sig. str" == breakdown_type or "sig. str." == breakdown_type:
+            # Only assign if not already set from Totals table
+            for stats, landed, attempted in ((fighter1_stats, f1_landed, f1_attempted), (fighter2_stats, f2_landed, f2_attempted)):
+                if stats.sig_strikes_landed is None and landed is not None:
+                    stats.sig_strikes_landed = landed
+                if stats.sig_strikes_attempted is None and attempted is not None:
+                    stats.sig_strikes_attempted = attempted
+
+
+def process_round_table(table_element, table_description, rounds, col1_is_fighter1, is_sig_strike_table=False):
+    """Processes a table containing round-by-round data (either general or sig strikes).
+
+    `rounds` maps round number to RoundStatRecord; the general table adds the
+    rounds, the sig strikes table only fills in rounds already there.
+    """
+    print(f"  Processing table identified as: {table_description}")
+
+    main_tbody = table_element.find('tbody', recursive=False) or table_element.find('tbody')
+    if not main_tbody:
+        print(f"    ERROR: Could not find a main tbody within the {table_description} table.")
+        return
+
+    print(f"    Found main tbody for {table_description} table. Iterating through its children...")
+
+    current_round_number = None
+    children = [child for child in main_tbody.children if isinstance(child, Tag)]
+    print(f"    Found {len(children)} direct child tags in main tbody: {[c.name for c in children]}")
+
+    for i, child in enumerate(children):
+        # Check if the child is a THEAD containing the round header
+        if child.name == 'thead':
+            # --- Simplified Selector ---
+            header_th = child.find('th', colspan=True) # Look for any 'th' with colspan inside the thead
+            if header_th:
+                header_text = header_th.get_text(strip=True)
+                round_match = re.search(r'round\s+(\d+)', header_text.lower())
+                if round_match:
+                    current_round_number = int(round_match.group(1))
+                    print(f"\n    Found Header THEAD for Round {current_round_number}: '{header_text}' (Child Index: {i})")
+                    continue # Expecting a TR next
+                else:
+                    print(f"    Found THEAD with th[colspan] (Child Index: {i}) but text '{header_text}' doesn't match 'Round X'.")
+                    current_round_number = None # Not a round header
+            else:
+                print(f"    Found THEAD (Child Index: {i}) but couldn't find 'th[colspan]' inside it.")
+                current_round_number = None
+
+        # Check if the child is a TR AND we just identified a round header
+        elif child.name == 'tr' and current_round_number is not None:
+            print(f"    Found data TR (Child Index: {i}) following Header for Round {current_round_number}. Processing...")
+            data_row = child
+
+            data_cells = data_row.find_all('td', class_='b-fight-details__table-col', recursive=False) or data_row.find_all('td', class_='b-fight-details__table-col')
+            if not data_cells:
+                 print(f"      ERROR: Could not find data cells (td.b-fight-details__table-col) in data row for Round {current_round_number}.")
+                 current_round_number = None
+                 continue
+
+            print(f"      Found {len(data_cells)} data cells for Round {current_round_number}")
+            print("      Debug: Cell values for this row:")
+            for cell_idx, cell in enumerate(data_cells):
+                 p_tags = cell.find_all('p', class_='b-fight-details__table-text')
+                 cell_values = [p.get_text(strip=True) for p in p_tags]
+                 print(f"        Cell {cell_idx}: {cell_values}")
+
+            if current_round_number not in rounds:
+                if is_sig_strike_table:
+                    print(f"      WARNING: Sig strike data found for Round {current_round_number}, but no general stats object exists. Skipping.")
+                    current_round_number = None
+                    continue
+                print(f"    Creating round stats for Round {current_round_number}")
+                rounds[current_round_number] = RoundStatRecord(round_number=current_round_number)
+
+            round_record = rounds[current_round_number]
+            fighter1_round_stats, fighter2_round_stats = round_record.fighter1, round_record.fighter2
+
+            print(f"      Attempting to process stats for Round {current_round_number} ({table_description})...")
+            if is_sig_strike_table:
+                # Sig Strike Indices: 0=Fighter, 1=Sig Str, 2=Sig Str %, 3=Head, 4=Body, 5=Leg, 6=Distance, 7=Clinch, 8=Ground
+                if len(data_cells) >= 4: process_round_stat(data_cells[3], 'Head', fighter1_round_stats, fighter2_round_stats, col1_is_fighter1, 'sig_strikes_head_landed', 'sig_strikes_head_attempted')
+                if len(data_cells) >= 5: process_round_stat(data_cells[4], 'Body', fighter1_round_stats, fighter2_round_stats, col1_is_fighter1, 'sig_strikes_body_landed', 'sig_strikes_body_attempted')
+                if len(data_cells) >= 6: process_round_stat(data_cells[5], 'Leg', fighter1_round_stats, fighter2_round_stats, col1_is_fighter1, 'sig_strikes_leg_landed', 'sig_strikes_leg_attempted')
+                if len(data_cells) >= 7: process_round_stat(data_cells[6], 'Distance', fighter1_round_stats, fighter2_round_stats, col1_is_fighter1, 'sig_strikes_distance_landed', 'sig_strikes_distance_attempted')
+                if len(data_cells) >= 8: process_round_stat(data_cells[7], 'Clinch', fighter1_round_stats, fighter2_round_stats, col1_is_fighter1, 'sig_strikes_clinch_landed', 'sig_strikes_clinch_attempted')
+                if len(data_cells) >= 9: process_round_stat(data_cells[8], 'Ground', fighter1_round_stats, fighter2_round_stats, col1_is_fighter1, 'sig_strikes_ground_landed', 'sig_strikes_ground_attempted')
+            else:
+                # General Stats Indices: 0=Fighter, 1=KD, 2=Sig Str, 3=Sig Str %, 4=Total Str, 5=TD, 6=TD %, 7=Sub Att, 8=Rev, 9=Ctrl
+                if len(data_cells) >= 2: process_round_stat(data_cells[1], 'KD', fighter1_round_stats, fighter2_round_stats, col1_is_fighter1, 'knockdowns')
+                if len(data_cells) >= 3: process_round_stat(data_cells[2], 'Sig. Str.', fighter1_round_stats, fighter2_round_stats, col1_is_fighter1, 'sig_strikes_landed', 'sig_strikes_attempted')
+                if len(data_cells) >= 4: process_round_stat(data_cells[3], 'Sig. Str. %', fighter1_round_stats, fighter2_round_stats, col1_is_fighter1, 'sig_strikes_pct', percentage=True)
+                if len(data_cells) >= 5: process_round_stat(data_cells[4], 'Total Str.', fighter1_round_stats, fighter2_round_stats, col1_is_fighter1, 'total_strikes_landed', 'total_strikes_attempted')
+                if len(data_cells) >= 6: process_round_stat(data_cells[5], 'TD', fighter1_round_stats, fighter2_round_stats, col1_is_fighter1, 'takedowns_landed', 'takedowns_attempted')
+                if len(data_cells) >= 8: process_round_stat(data_cells[7], 'Sub. Att', fighter1_round_stats, fighter2_round_stats, col1_is_fighter1, 'submission_attempts')
+                if len(data_cells) >= 9: process_round_stat(data_cells[8], 'Rev.', fighter1_round_stats, fighter2_round_stats, col1_is_fighter1, 'reversals')
+                if len(data_cells) >= 10: process_round_stat(data_cells[9], 'Ctrl', fighter1_round_stats, fighter2_round_stats, col1_is_fighter1, 'control_time_seconds')
+
+            current_round_number = None # Reset after processing the TR
+
+        elif child.name == 'tbody':
+             print(f"    Found TBODY (Child Index: {i}) but current_round_number is None. Skipping.")
+
+
+def parse_round_stats(soup, col1_is_fighter1):
+    """Parse the round-by-round tables into a list of RoundStatRecords (in page order)."""
+    print("\n--- Processing Round-by-Round Stats ---")
+
+    rounds = {} # Shared by the general and sig strikes tables
+
+    all_sections = soup.select('section.b-fight-details__section')
+    per_round_sections = []
+    print(f"Found {len(all_sections)} sections. Identifying 'Per round' sections...")
+    for i, section in enumerate(all_sections):
+        link = section.select_one('a.b-fight-details__collapse-link_rnd')
+        if link:
+            print(f"  Section {i+1} contains a 'Per round' link.")
+            per_round_sections.append(section)
+
+    if len(per_round_sections) < 1:
+         print("WARNING: Could not find any 'Per round' sections. Skipping round stats.")
+         return []
+    if len(per_round_sections) < 2:
+        print(f"WARNING: Expected 2 sections with 'Per round' links, but found {len(per_round_sections)}. Sig Strike round stats may be missing.")
+
+    # Process General Stats Table (if found)
+    if len(per_round_sections) >= 1:
+        general_stats_section = per_round_sections[0]
+        print("\nProcessing FIRST 'Per round' section for GENERAL stats...")
+        general_stats_table = general_stats_section.select_one(':scope > table.b-fight-details__table') or general_stats_section.select_one('table.b-fight-details__table')
+        if general_stats_table:
+            process_round_table(general_stats_table, "General", rounds, col1_is_fighter1, is_sig_strike_table=False)
+        else:
+            print("  WARNING: Could not find table within the first 'Per round' section.")
+
+    # Process Sig Strikes Table (if found)
+    if len(per_round_sections) >= 2:
+        sig_strike_section = per_round_sections[1]
+        print("\nProcessing SECOND 'Per round' section for SIGNIFICANT STRIKE stats...")
+        sig_strike_table = sig_strike_section.select_one(':scope > table.b-fight-details__table') or sig_strike_section.select_one('table.b-fight-details__table')
+        if sig_strike_table:
+            process_round_table(sig_strike_table, "Significant Strikes", rounds, col1_is_fighter1, is_sig_strike_table=True)
+        else:
+            print("  WARNING: Could not find table within the second 'Per round' section.")
+
+    return list(rounds.values())
+
+
+def process_round_stat(cell, stat_name, fighter1_stats, fighter2_stats, col1_is_fighter1,
+                      landed_field, attempted_field=None, percentage=False):
+    """Helper function to process a single stat cell for round data"""
+    p_tags = cell.find_all('p', class_='b-fight-details__table-text')
+    if len(p_tags) < 2:
+        # Allow for stats that might only have one value (though unlikely in round tables)
+        if len(p_tags) == 1:
+             val1_raw = p_tags[0].text.strip()
+             val2_raw = "0" # Assume 0 for the missing fighter? Or None? Let's use 0 for now.
+             print(f"      WARNING: {stat_name} cell only has 1 p tag. Assuming 0 for second fighter. Values: ['{val1_raw}']")
+        else:
+             print(f"      WARNING: {stat_name} cell has 0 p tags. Skipping.")
+             return # Skip if no data
+    else:
+        val1_raw = p_tags[0].text.strip()
+        val2_raw = p_tags[1].text.strip()
+
+    # Parse values
+    landed1, attempted1, pct1 = parse_stat_value(val1_raw)
+    landed2, attempted2, pct2 = parse_stat_value(val2_raw)
+
+    # Assign based on fighter order
+    if col1_is_fighter1:
+        f1_landed, f1_attempted = landed1, attempted1
+        f2_landed, f2_attempted = landed2, attempted2
+    else:
+        f1_landed, f1_attempted = landed2, attempted2
+        f2_landed, f2_attempted = landed1, attempted1
+
+    # Handle percentage values
+    if percentage:
+        if f1_landed is not None:
+            # Convert percentage (e.g. 72) to decimal (0.72)
+            setattr(fighter1_stats, landed_field, f1_landed / 100.0)
+        if f2_landed is not None:
+            setattr(fighter2_stats, landed_field, f2_landed / 100.0)
+    else:
+        # Set landed value
+        if f1_landed is not None:
+            setattr(fighter1_stats, landed_field, f1_landed)
+        if f2_landed is not None:
+            setattr(fighter2_stats, landed_field, f2_landed)
+
+        # Set attempted value if field provided
+        if attempted_field:
+            if f1_attempted is not None:
+                setattr(fighter1_stats, attempted_field, f1_attempted)
+            if f2_attempted is not None:
+                setattr(fighter2_stats, attempted_field, f2_attempted)
+
+
+def parse_page(content, url):
+    """Parse any supported page, picking the parser from the URL. Used by the parse pool."""
+    if 'event-details' in url:
+        return parse_event_page(content, url)
+    if 'fighter-details' in url:
+        return parse_fighter_page(content, url)
+    if 'fight-details' in url:
+        return parse_fight_page(content, url)
+    raise ValueError(f"No parser for {url}")
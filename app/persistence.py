@@ -0,0 +1,342 @@
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import aliased
+
+from app.config import Config
+from app.models import Fighter, Event, Fight, FightRoundStats
+
+# Rows per INSERT statement; keeps sqlite under its bound-parameter limit
+UPSERT_CHUNK_SIZE = 500
+
+# Columns the database or the model fills in, never copied from scraped data
+_MANAGED_COLUMNS = ('id', 'created_at', 'updated_at')
+
+
+def _insert_for(db_session, model):
+    """Return the dialect's INSERT construct, which supports ON CONFLICT."""
+    dialect = db_session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        return postgresql.insert(model)
+    if dialect == 'sqlite':
+        return sqlite.insert(model)
+    raise NotImplementedError(f"Upserts are not supported on the '{dialect}' database backend")
+
+
+def upsert(db_session, model, rows, key_columns):
+    """Insert rows, or update the existing rows they collide with on key_columns.
+
+    `key_columns` must be covered by a unique constraint/index. None values
+    are dropped, so new rows get the column default and existing rows keep
+    their stored value, like the scraper's "only overwrite with real data"
+    updates. Rows are grouped by the columns they provide and written in
+    multi-row statements. Returns {key tuple: id}.
+    """
+    # Merge duplicate keys first: ON CONFLICT cannot touch the same row twice in one statement
+    merged = {}
+    for row in rows:
+        values = {k: v for k, v in row.items() if v is not None and k not in _MANAGED_COLUMNS}
+        key = tuple(values.get(col) for col in key_columns)
+        if None in key:
+            raise ValueError(f"{model.__name__} row is missing its key {key_columns}: {row}")
+        merged.setdefault(key, {}).update(values)
+
+    groups = {}
+    for values in merged.values():
+        groups.setdefault(frozenset(values), []).append(values)
+
+    ids = {}
+    table = model.__table__
+    for columns, group in groups.items():
+        for start in range(0, len(group), UPSERT_CHUNK_SIZE):
+            stmt = _insert_for(db_session, model).values(group[start:start + UPSERT_CHUNK_SIZE])
+            set_ = {col: stmt.excluded[col] for col in columns if col not in key_columns}
+            if 'updated_at' in table.c:
+                # onupdate= defaults do not fire for ON CONFLICT DO UPDATE
+                set_['updated_at'] = datetime.utcnow()
+            stmt = stmt.on_conflict_do_update(index_elements=list(key_columns), set_=set_)
+            stmt = stmt.returning(table.c.id, *(table.c[col] for col in key_columns))
+            for row in db_session.execute(stmt):
+                ids[tuple(row[1:])] = row[0]
+    return ids
+
+
+def insert_missing(db_session, model, rows, key_columns):
+    """Insert rows whose key_columns are not taken yet; rows that collide are left alone.
+
+    Like upsert(), but with ON CONFLICT DO NOTHING, so concurrent writers can
+    insert the same keys without waiting on or overwriting each other.
+    """
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        stmt = _insert_for(db_session, model).values(rows[start:start + UPSERT_CHUNK_SIZE])
+        db_session.execute(stmt.on_conflict_do_nothing(index_elements=list(key_columns)))
+
+
+def upsert_event(db_session, event_name, event_date, location=None, content_hash=None):
+    """Insert or update an event keyed on (event_name, event_date) and return its ID."""
+    ids = upsert(db_session, Event,
+                 [{'event_name': event_name, 'event_date': event_date, 'location': location,
+                   'content_hash': content_hash}],
+                 ('event_name', 'event_date'))
+    return ids[(event_name, event_date)]
+
+
+# New rows always carry an ID, so once no legacy rows are left the check is skipped
+_no_legacy_fighters = False
+
+
+def _claim_legacy_fighter(db_session, values):
+    """Give a fighter stored before ufcstats_id existed (matched by name) its UFCStats ID."""
+    global _no_legacy_fighters
+    if _no_legacy_fighters:
+        return
+    if db_session.query(Fighter.id).filter(Fighter.ufcstats_id.is_(None)).first() is None:
+        _no_legacy_fighters = True
+        return
+
+    legacy, known = aliased(Fighter), aliased(Fighter)
+    legacy_id = (select(func.min(legacy.id))
+                 .where(legacy.first_name == values['first_name'],
+                        legacy.last_name == values['last_name'],
+                        legacy.ufcstats_id.is_(None))
+                 .scalar_subquery())
+    already_known = select(known.id).where(known.ufcstats_id == values['ufcstats_id']).exists()
+    db_session.execute(
+        update(Fighter)
+        .where(Fighter.id == legacy_id, ~already_known)
+        .values(ufcstats_id=values['ufcstats_id'])
+        .execution_options(synchronize_session=False)
+    )
+
+
+def upsert_fighter(db_session, values):
+    """Insert or update a fighter keyed on ufcstats_id and return its ID."""
+    _claim_legacy_fighter(db_session, values)
+    ids = upsert(db_session, Fighter, [values], ('ufcstats_id',))
+    return ids[(values['ufcstats_id'],)]
+
+
+def upsert_card_fights(db_session, event_id, fights):
+    """Insert or update every fight on an event card in one statement.
+
+    `fights` are column dicts carrying the fight-details `ufcstats_id`. Fights
+    stored before that column existed are matched by fighter pair and get
+    their ID first. Returns {ufcstats_id: fight ID}.
+    """
+    if not fights:
+        return {}
+    legacy = {}
+    for fight in db_session.query(Fight.id, Fight.fighter1_id, Fight.fighter2_id).filter(
+            Fight.event_id == event_id, Fight.ufcstats_id.is_(None)):
+        legacy[frozenset((fight.fighter1_id, fight.fighter2_id))] = fight.id
+    backfill = []
+    for values in fights:
+        legacy_id = legacy.pop(frozenset((values['fighter1_id'], values['fighter2_id'])), None)
+        if legacy_id:
+            backfill.append({'id': legacy_id, 'ufcstats_id': values['ufcstats_id']})
+    if backfill:
+        db_session.execute(update(Fight), backfill)
+
+    rows = [dict(values, event_id=event_id) for values in fights]
+    ids = upsert(db_session, Fight, rows, ('ufcstats_id',))
+    # The card columns overwrite what the fight-details pages filled in (e.g. scheduled_rounds),
+    # so those pages no longer count as stored unchanged
+    db_session.execute(
+        update(Fight)
+        .where(Fight.id.in_(list(ids.values())), Fight.content_hash.is_not(None))
+        .values(content_hash=None)
+        .execution_options(synchronize_session=False)
+    )
+    return {key[0]: fight_id for key, fight_id in ids.items()}
+
+
+def stored_card_fights(db_session, event_id, fights):
+    """Return {ufcstats_id: fight ID} for the fights of an event card that are already stored."""
+    ufcstats_ids = [values['ufcstats_id'] for values in fights]
+    if not ufcstats_ids:
+        return {}
+    rows = db_session.query(Fight.ufcstats_id, Fight.id).filter(
+        Fight.event_id == event_id, Fight.ufcstats_id.in_(ufcstats_ids))
+    return dict(rows.all())
+
+
+def upsert_round_stats(db_session, rows):
+    """Write round-stat rows in one statement keyed on `_fight_fighter_round_uc`."""
+    upsert(db_session, FightRoundStats, rows, ('fight_id', 'fighter_id', 'round_number'))
+
+
+def save_fight_details(db_session, fight, record, swapped=False, content_hash=None):
+    """Write a parsed fight-details page onto its stored fight, plus the round stats.
+
+    `fight` carries the stored row's 'id', 'fighter1_id' and 'fighter2_id'.
+    `record` is a FightRecord in page order; `swapped` says the page lists the
+    stored fighter2 first. Values the page did not provide are left untouched.
+    `content_hash` is the page's parsers.content_hash(), stored with the fight.
+    Returns the number of round-stat rows written.
+    """
+    fighter1_stats, fighter2_stats = (record.fighter2, record.fighter1) if swapped else (record.fighter1, record.fighter2)
+    values = {
+        'referee': record.referee or None,
+        'finish_details': record.finish_details or None,
+        'scheduled_rounds': record.scheduled_rounds,
+        'is_title_fight': record.is_title_fight,
+        'content_hash': content_hash,
+    }
+    if record.winner:
+        values['winner_id'] = fight['fighter1_id'] if (record.winner == 1) != swapped else fight['fighter2_id']
+    if fighter1_stats:
+        values.update(fighter1_stats.values('fighter1_'))
+    if fighter2_stats:
+        values.update(fighter2_stats.values('fighter2_'))
+    values = {k: v for k, v in values.items() if v is not None}
+    db_session.execute(update(Fight), [dict(values, id=fight['id'])])
+
+    rows = []
+    for round_record in record.rounds:
+        stats = (round_record.fighter2, round_record.fighter1) if swapped else (round_record.fighter1, round_record.fighter2)
+        for fighter_id, line in zip((fight['fighter1_id'], fight['fighter2_id']), stats):
+            rows.append(dict(line.values(), fight_id=fight['id'], fighter_id=fighter_id,
+                             round_number=round_record.round_number))
+    if rows:
+        upsert_round_stats(db_session, rows)
+    return len(rows)
+
+
+class UnitOfWork:
+    """One database transaction around a scraped page, instead of one per row.
+
+    While a unit of work is active on a session, the scraper's commit() and
+    rollback() helpers below flush and roll back to the current savepoint
+    instead of ending the transaction. The transaction is committed when the
+    unit of work exits (and every `fights_per_commit` fights, if set), so an
+    event card costs one commit. Each bout runs in its own savepoint, so one
+    bad bout does not roll back the rest of the card.
+
+    Side effects outside the database (like identity-map entries) register an
+    undo with on_rollback(); it runs if their savepoint or transaction is rolled back.
+    """
+
+    def __init__(self, db_session, fights_per_commit=None):
+        self.db_session = db_session
+        self.fights_per_commit = Config.SCRAPER_FIGHTS_PER_COMMIT if fights_per_commit is None else fights_per_commit
+        self._fights = 0
+        # One entry per open savepoint: [nested transaction, undo callbacks]; entry 0 is the transaction itself
+        self._levels = [[None, []]]
+
+    def __enter__(self):
+        if 'unit_of_work' in self.db_session.info:
+            raise RuntimeError("A unit of work is already active on this session")
+        self.db_session.info['unit_of_work'] = self
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        del self.db_session.info['unit_of_work']
+        if exc_type is None:
+            try:
+                self._commit()
+            except Exception:
+                self._rollback_all()
+                raise
+        else:
+            self._rollback_all()
+        return False
+
+    def _commit(self):
+        self.db_session.commit()
+        self._levels = [[None, []]]
+        self._fights = 0
+
+    def _rollback_all(self):
+        self.db_session.rollback()
+        for _, undo in reversed(self._levels):
+            for callback in reversed(undo):
+                callback()
+        self._levels = [[None, []]]
+
+    @contextmanager
+    def savepoint(self):
+        self._levels.append([self.db_session.begin_nested(), []])
+        try:
+            yield
+        except BaseException:
+            # Roll this level back without reopening it, as rollback() would
+            nested, undo = self._levels.pop()
+            nested.rollback()
+            for callback in reversed(undo):
+                callback()
+            raise
+        nested, undo = self._levels.pop()
+        nested.commit()
+        self._levels[-1][1].extend(undo) # Released work is undone if the outer level rolls back
+
+    def flush(self):
+        self.db_session.flush()
+
+    def rollback(self):
+        """Roll back to the innermost savepoint (or the whole transaction outside one)."""
+        if len(self._levels) == 1:
+            self._rollback_all()
+            return
+        nested, undo = self._levels[-1]
+        nested.rollback()
+        for callback in reversed(undo):
+            callback()
+        # Keep a savepoint open for whatever the rest of the bout writes
+        self._levels[-1] = [self.db_session.begin_nested(), []]
+
+    def fight_done(self):
+        """Count a finished bout; commit once `fights_per_commit` have accumulated."""
+        self._fights += 1
+        if self.fights_per_commit and self._fights >= self.fights_per_commit and len(self._levels) == 1:
+            self._commit()
+
+    def on_rollback(self, callback):
+        self._levels[-1][1].append(callback)
+
+
+def _active_unit_of_work(db_session):
+    return db_session.info.get('unit_of_work')
+
+
+def commit(db_session):
+    """Commit, or only flush when a UnitOfWork owns the transaction."""
+    uow = _active_unit_of_work(db_session)
+    if uow is None:
+        db_session.commit()
+    else:
+        uow.flush()
+
+
+def rollback(db_session):
+    """Roll back, or only to the current savepoint when a UnitOfWork is active."""
+    uow = _active_unit_of_work(db_session)
+    if uow is None:
+        db_session.rollback()
+    else:
+        uow.rollback()
+
+
+@contextmanager
+def savepoint(db_session):
+    """Run a bout in its own savepoint when a UnitOfWork is active."""
+    uow = _active_unit_of_work(db_session)
+    if uow is None:
+        yield
+    else:
+        with uow.savepoint():
+            yield
+
+
+def fight_done(db_session):
+    uow = _active_unit_of_work(db_session)
+    if uow is not None:
+        uow.fight_done()
+
+
+def on_rollback(db_session, callback):
+    """Run callback if the writes made so far are rolled back (no-op once committed)."""
+    uow = _active_unit_of_work(db_session)
+    if uow is not None:
+        uow.on_rollback(callback)
@@ -0,0 +1,228 @@
+"""Staged crawl pipeline: fetch -> parse -> persist, connected by bounded queues.
+
+Each frontier entry becomes a job: its page plus, for an event, every
+fighter and fight-details page on its card. Jobs move through three stages:
+
+- fetch: SCRAPER_PIPELINE_FETCHERS threads download pages through the shared
+  Fetcher (rate limit and page cache included). Card pages of jobs already
+  under way go before the first page of a new job.
+- parse: SCRAPER_PIPELINE_PARSERS threads parse each page, on the parse
+  pool's worker processes when it has them, and queue the card pages of
+  every parsed event page for fetching. Fighter and fight-details pages
+  unchanged since they were stored are not parsed here; the writer only
+  reads the history links of an unchanged fighter page.
+- persist: a single writer (the crawling thread) runs the existing scrape_*
+  code on each finished job, which finds its pages and records preloaded in
+  the Fetcher and ParsePool, so it only waits on the database. Jobs that
+  finished together are written in one transaction, up to
+  SCRAPER_PIPELINE_WRITE_BATCH at a time, each in its own savepoint.
+
+Backpressure: fetched pages wait in a queue of SCRAPER_PIPELINE_QUEUE_SIZE,
+so fetchers stall when parsing falls behind, and a new job is only started
+while fewer than SCRAPER_PIPELINE_JOBS are unwritten, so a slow database
+throttles fetching instead of piling pages up in memory.
+"""
+import itertools
+import queue
+import threading
+import traceback
+
+from app.config import Config
+from app.identity import page_hashes
+from app.parsers import card_page_urls, content_hash
+from app.persistence import UnitOfWork, savepoint
+
+# Fetch queue priorities: finish the jobs under way before starting new ones
+CARD_PAGE, JOB_PAGE = 0, 1
+
+
+class PageJob:
+    """A frontier entry travelling through the pipeline."""
+
+    __slots__ = ('url', 'depth', 'urls', 'remaining')
+
+    def __init__(self, url, depth):
+        self.url = url
+        self.depth = depth # Frontier depth; links found on the page are one deeper
+        self.urls = [url] # Every page fetched for this job
+        self.remaining = 1 # Pages not parsed yet
+
+
+class CrawlPipeline:
+    """Runs a crawl from a frontier through the fetch, parse and persist stages.
+
+    `write_page(url, session, scrape_queue, processed_urls)` persists one
+    frontier entry inside the writer's transaction; scrape_url does.
+    """
+
+    def __init__(self, frontier, write_page, session, fetcher, parse_pool,
+                 fetchers=None, parsers=None, max_jobs=None, queue_size=None, write_batch=None):
+        self.frontier = frontier
+        self.processed = frontier.processed
+        self.write_page = write_page
+        self.session = session
+        self.fetcher = fetcher
+        self.parse_pool = parse_pool
+        self.fetchers = fetchers or Config.SCRAPER_PIPELINE_FETCHERS or fetcher.rate_limiter.max_in_flight
+        self.parsers = parsers or Config.SCRAPER_PIPELINE_PARSERS or parse_pool.workers
+        self.max_jobs = max_jobs or Config.SCRAPER_PIPELINE_JOBS
+        self.write_batch = write_batch or Config.SCRAPER_PIPELINE_WRITE_BATCH
+        if Config.SCRAPER_FIGHTS_PER_COMMIT:
+            self.write_batch = 1 # Mid-card commits need the card's transaction to themselves
+
+        self.fetch_queue = queue.PriorityQueue() # Holds at most the pages of max_jobs jobs
+        self.parse_queue = queue.Queue(maxsize=queue_size or Config.SCRAPER_PIPELINE_QUEUE_SIZE)
+        self.write_queue = queue.Queue()
+        self.jobs_in_flight = 0 # Started and not written yet; only touched by the writer
+        self._seq = itertools.count() # FIFO order within a fetch priority
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+
+    # --- Writer (the calling thread) ---
+
+    def run(self):
+        """Crawl until the frontier is empty and every started job is written."""
+        self._start_threads()
+        while True:
+            self._admit()
+            if not self.jobs_in_flight:
+                if not self.frontier:
+                    break
+                continue
+            batch = [self.write_queue.get()]
+            while len(batch) < self.write_batch:
+                try:
+                    batch.append(self.write_queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def _admit(self):
+        """Start jobs for frontier entries while fewer than max_jobs are in flight."""
+        while self.frontier and self.jobs_in_flight < self.max_jobs:
+            url = self.frontier.pop()
+            depth = self.frontier.current_depth
+            print(f"\n>>> Processing URL from Queue: {url}")
+            if url in self.processed:
+                print(f"Skipping already processed URL: {url}")
+                continue
+            if 'event-details' not in url and 'fighter-details' not in url:
+                # Nothing to fetch; write_page just records it
+                with UnitOfWork(self.session):
+                    self.write_page(url, self.session, self.frontier, self.processed)
+                continue
+            self.jobs_in_flight += 1
+            self.fetch_queue.put((JOB_PAGE, next(self._seq), PageJob(url, depth), url))
+
+    def _write(self, batch):
+        try:
+            with UnitOfWork(self.session):
+                for job in batch:
+                    # Other pages were popped since this one; its links are queued one level below it
+                    self.frontier.current_depth = job.depth
+                    if len(batch) == 1:
+                        self.write_page(job.url, self.session, self.frontier, self.processed)
+                        continue
+                    # One bad page is rolled back without losing the rest of the batch
+                    try:
+                        with savepoint(self.session):
+                            self.write_page(job.url, self.session, self.frontier, self.processed)
+                    except Exception as e:
+                        print(f"ERROR: Writing {job.url} failed, rolled back this page: {type(e).__name__} - {e}")
+                        traceback.print_exc()
+        except Exception as e:
+            print(f"Unexpected error writing {', '.join(job.url for job in batch)}: {type(e).__name__} - {e}")
+            traceback.print_exc()
+        finally:
+            for job in batch:
+                # Drop pages the writer skipped (e.g. fighters already processed)
+                self.fetcher.forget(job.urls)
+                self.parse_pool.forget(job.urls)
+            self.jobs_in_flight -= len(batch)
+
+    # --- Fetch and parse stages (worker threads) ---
+
+    def _start_threads(self):
+        for i in range(self.fetchers):
+            self._threads.append(threading.Thread(target=self._fetch_stage, name=f'pipeline-fetch-{i}', daemon=True))
+        for i in range(self.parsers):
+            self._threads.append(threading.Thread(target=self._parse_stage, name=f'pipeline-parse-{i}', daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def _get(self, q):
+        """Next item from q, or None once the pipeline is stopping."""
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return None
+
+    def _put(self, q, item):
+        """Put item on q, waiting while it is full (backpressure); False once the pipeline is stopping."""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _fetch_stage(self):
+        while True:
+            item = self._get(self.fetch_queue)
+            if item is None:
+                return
+            _, _, job, url = item
+            try:
+                content = self.fetcher.fetch(url)
+            except Exception as e:
+                # The writer's scrape function reports it in context
+                self.fetcher.preload(url, error=e)
+                content = None
+            else:
+                self.fetcher.preload(url, content)
+            if not self._put(self.parse_queue, (job, url, content)):
+                return
+
+    def _parse_stage(self):
+        while True:
+            item = self._get(self.parse_queue)
+            if item is None:
+                return
+            job, url, content = item
+            try:
+                if content is not None:
+                    self._parse(job, url, content)
+            except Exception as e:
+                # Left unparsed: the writer parses it again and reports the error in context
+                print(f"Parse stage failed for {url}: {type(e).__name__}: {e}")
+            finally:
+                with self._lock:
+                    job.remaining -= 1
+                    finished = job.remaining == 0
+                if finished:
+                    self.write_queue.put(job)
+
+    def _parse(self, job, url, content):
+        if 'event-details' not in url and page_hashes.unchanged(url, content_hash(content)):
+            return # The writer skips it too
+        self.parse_pool.submit(url, content) # On a worker process when the pool has them
+        record = self.parse_pool.parse(url, content)
+        self.parse_pool.preload(url, record)
+        if url == job.url and record is not None and 'event-details' in url:
+            card_urls = [card_url for card_url in card_page_urls(record) if card_url not in self.processed]
+            with self._lock:
+                job.remaining += len(card_urls)
+                job.urls.extend(card_urls)
+            for card_url in card_urls:
+                self.fetch_queue.put((CARD_PAGE, next(self._seq), job, card_url))
+
+    def close(self):
+        """Stop the fetch and parse threads."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
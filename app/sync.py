@@ -0,0 +1,94 @@
+from datetime import date, datetime, timedelta
+
+import requests
+from sqlalchemy import func
+
+from app import db
+from app.config import Config
+from app.fetcher import get_fetcher, close_fetcher
+from app.frontier import open_frontier
+from app.models import Event, Fight
+from app.parsers import make_soup, page_parts
+from app.scraper import crawl
+
+
+# Only the listing's table rows are built into the soup
+LISTING_PAGE_PARTS = page_parts(['b-statistics__table-row'])
+
+
+def fetch_event_listing(listing_url=None):
+    """Return (url, name, date) for every event on the UFCStats completed-events listing."""
+    listing_url = listing_url or Config.SCRAPER_EVENTS_URL
+    content = get_fetcher().fetch(listing_url, revalidate=True)
+    soup = make_soup(content, LISTING_PAGE_PARTS)
+
+    events = []
+    for row in soup.select('tr.b-statistics__table-row'):
+        link = row.select_one('a.b-link')
+        date_elem = row.select_one('span.b-statistics__date')
+        if not link or not link.get('href') or not date_elem:
+            continue # Header/spacer rows
+        try:
+            event_date = datetime.strptime(date_elem.get_text(strip=True), '%B %d, %Y').date()
+        except ValueError:
+            print(f"WARNING: Could not parse listing date '{date_elem.get_text(strip=True)}' for {link['href']}")
+            event_date = None
+        events.append((link['href'], link.get_text(strip=True), event_date))
+    return events
+
+
+def events_to_sync(listing, recent_days=None):
+    """Diff the listing against the events table.
+
+    An event needs syncing if it is not in the database yet, if it has no
+    fights stored (an earlier ingest stopped partway), or if it took place
+    within the last `recent_days` days, while results may still be amended.
+    """
+    recent_days = Config.SCRAPER_RECENT_EVENT_DAYS if recent_days is None else recent_days
+    recent_cutoff = date.today() - timedelta(days=recent_days)
+
+    fight_counts = dict(
+        ((name, event_date), count) for name, event_date, count in
+        db.session.query(Event.event_name, Event.event_date, func.count(Fight.id))
+        .outerjoin(Fight, Fight.event_id == Event.id)
+        .group_by(Event.id)
+        .all()
+    )
+
+    to_sync = []
+    for url, name, event_date in listing:
+        key = (name, event_date)
+        if key not in fight_counts:
+            to_sync.append((url, name, event_date, 'new'))
+        elif fight_counts[key] == 0:
+            to_sync.append((url, name, event_date, 'no fights stored'))
+        elif event_date and event_date >= recent_cutoff:
+            to_sync.append((url, name, event_date, 'recent'))
+    return to_sync
+
+
+def sync_events(recent_days=None, dry_run=False):
+    """Crawl only new or changed events (and the fighters on them)."""
+    print("--- Starting Incremental Sync ---")
+    try:
+        listing = fetch_event_listing()
+    except requests.exceptions.RequestException as req_err:
+        print(f"HTTP Error fetching event listing: {req_err}")
+        close_fetcher()
+        return []
+    print(f"Event listing has {len(listing)} events.")
+
+    to_sync = events_to_sync(listing, recent_days)
+    for url, name, event_date, reason in to_sync:
+        print(f"  {reason:>16}: {name} ({event_date}) {url}")
+    print(f"{len(to_sync)} events to sync.")
+    if dry_run or not to_sync:
+        close_fetcher()
+        return to_sync
+
+    # An in-memory frontier that never follows fighter histories outward:
+    # only the listed events and the fighters on their cards are scraped.
+    frontier = open_frontier(persistent=False, last_fetched=get_fetcher().last_fetched, follow_links=False)
+    frontier.seed(url for url, _, _, _ in to_sync)
+    crawl(frontier)
+    return to_sync
@@ -0,0 +1,242 @@
+"""Crawl queue shared by several scraper processes through the crawl_queue table.
+
+`flask worker` processes, on one host or several, crawl from the same
+PostgreSQL database. Each worker claims the most urgent page with
+`SELECT ... FOR UPDATE SKIP LOCKED`, so workers never wait on or duplicate
+each other's claims, and holds it under a lease (SCRAPER_QUEUE_LEASE_SECONDS).
+A page whose worker died is reclaimed once its lease expires. A page that
+fails is retried after a backoff, up to SCRAPER_QUEUE_MAX_ATTEMPTS claims,
+and then marked failed.
+
+Links found on a page are queued, and the page is marked done, in the same
+transaction as its data, so a page rolled back is retried with its links.
+SQLite has no row locks; there a claim is a single UPDATE under its
+database-wide write lock, which is enough for a few workers on one host.
+"""
+import os
+import socket
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, delete, exists, func, or_, select, update
+
+from app.config import Config
+from app.frontier import canonical_url, crawl_priority
+from app.models import CrawlTask
+from app.persistence import insert_missing, on_rollback, upsert
+
+
+@dataclass(slots=True)
+class ClaimedTask:
+    id: int
+    url: str
+    depth: int
+    attempts: int
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class QueueProcessedSet:
+    """Visited-URL set backed by the crawl_queue table.
+
+    add() marks a page done in the current transaction; membership checks
+    look at this worker's own pages first and then at what other workers finished.
+    """
+
+    def __init__(self, queue):
+        self.queue = queue
+        self._done = set()
+        self._failed = set()
+
+    def __contains__(self, url):
+        key = canonical_url(url)
+        if key in self._done:
+            return True
+        session = self.queue.db_session
+        if session.execute(select(exists().where(CrawlTask.url == key, CrawlTask.status == 'done'))).scalar():
+            self._done.add(key)
+            return True
+        return False
+
+    def add(self, url):
+        key = canonical_url(url)
+        if key in self._done:
+            return
+        session = self.queue.db_session
+        upsert(session, CrawlTask, [{'url': key, 'status': 'done', 'lease_owner': self.queue.worker_id}], ('url',))
+        self._done.add(key)
+        on_rollback(session, lambda: self._done.discard(key))
+
+    def mark_failed(self, url, error):
+        """Record a page that could not be fetched as failed: the queue's dead letters, see retry_failed()."""
+        key = canonical_url(url)
+        session = self.queue.db_session
+        upsert(session, CrawlTask, [{'url': key, 'status': 'failed', 'last_error': str(error),
+                                     'lease_owner': self.queue.worker_id}], ('url',))
+        # Processed for this worker's run, like a done page
+        self._done.add(key)
+        self._failed.add(key)
+        on_rollback(session, lambda: (self._done.discard(key), self._failed.discard(key)))
+
+    def has_failed(self, url):
+        return canonical_url(url) in self._failed
+
+    def discard(self, url):
+        """Forget that a page was processed, so the next worker to meet it scrapes it again."""
+        key = canonical_url(url)
+        session = self.queue.db_session
+        session.execute(delete(CrawlTask).where(CrawlTask.url == key).execution_options(synchronize_session=False))
+        if key in self._done:
+            self._done.discard(key)
+            on_rollback(session, lambda: self._done.add(key))
+
+    def __len__(self):
+        return len(self._done)
+
+
+class WorkQueue:
+    """The shared crawl queue, with the append/contains interface scrape_* expect of a frontier."""
+
+    def __init__(self, db_session, worker_id=None, lease_seconds=None, max_attempts=None, retry_delay=None):
+        self.db_session = db_session
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = Config.SCRAPER_QUEUE_LEASE_SECONDS if lease_seconds is None else lease_seconds
+        self.max_attempts = Config.SCRAPER_QUEUE_MAX_ATTEMPTS if max_attempts is None else max_attempts
+        self.retry_delay = Config.SCRAPER_QUEUE_RETRY_DELAY if retry_delay is None else retry_delay
+        self.processed = QueueProcessedSet(self)
+        self._queued = set() # Pages this worker queued, so repeated links cost no statement
+        self._current_depth = -1
+
+    # --- Queue interface used by the scrape functions ---
+
+    def append(self, url, event_date=None, depth=None):
+        """Queue url in the current transaction unless some worker already queued it.
+
+        Pages already done need no check first: the insert leaves their rows alone.
+        """
+        key = canonical_url(url)
+        if key in self._queued or key in self.processed._done:
+            return
+        if depth is None:
+            depth = self._current_depth + 1
+        priority = crawl_priority(key, depth, event_date)[0]
+        insert_missing(self.db_session, CrawlTask, [{'url': key, 'priority': priority, 'depth': depth,
+                                                     'status': 'pending', 'attempts': 0,
+                                                     'available_at': datetime.utcnow()}], ('url',))
+        self._queued.add(key)
+        on_rollback(self.db_session, lambda: self._queued.discard(key))
+
+    def __contains__(self, url):
+        return canonical_url(url) in self._queued
+
+    # --- Worker interface ---
+
+    def seed(self, urls):
+        """Queue start URLs (depth 0) that no worker has queued yet."""
+        for url in urls:
+            self.append(url, depth=0)
+        self.db_session.commit()
+
+    def claim(self):
+        """Lease the most urgent claimable page to this worker; None if there is none right now.
+
+        Claimable are pending pages past their backoff and pages whose lease
+        expired with attempts left. Rows another worker is claiming are skipped, not waited on.
+        """
+        now = datetime.utcnow()
+        claimable = (
+            select(CrawlTask.id)
+            .where(or_(and_(CrawlTask.status == 'pending', CrawlTask.available_at <= now),
+                       and_(CrawlTask.status == 'leased', CrawlTask.leased_until < now,
+                            CrawlTask.attempts < self.max_attempts)))
+            .order_by(CrawlTask.priority, CrawlTask.depth, CrawlTask.id)
+            .limit(1)
+            .with_for_update(skip_locked=True) # Not rendered on SQLite, where the UPDATE holds the write lock
+        )
+        stmt = (
+            update(CrawlTask)
+            .where(CrawlTask.id.in_(claimable))
+            .values(status='leased', lease_owner=self.worker_id, attempts=CrawlTask.attempts + 1,
+                    leased_until=now + timedelta(seconds=self.lease_seconds), updated_at=now)
+            .returning(CrawlTask.id, CrawlTask.url, CrawlTask.depth, CrawlTask.attempts)
+            .execution_options(synchronize_session=False)
+        )
+        row = self.db_session.execute(stmt).first()
+        self.db_session.commit()
+        if row is None:
+            return None
+        task = ClaimedTask(*row)
+        self._current_depth = task.depth
+        return task
+
+    def _update_own(self, task, **values):
+        """Update task if this worker still holds it (its lease may have expired and been reclaimed)."""
+        self.db_session.execute(
+            update(CrawlTask)
+            .where(CrawlTask.id == task.id, CrawlTask.status == 'leased', CrawlTask.lease_owner == self.worker_id)
+            .values(updated_at=datetime.utcnow(), **values)
+            .execution_options(synchronize_session=False)
+        )
+        self.db_session.commit()
+
+    def fail(self, task, error):
+        """Give a page back for a retry after a backoff (doubling per attempt), or mark it failed."""
+        if task.attempts >= self.max_attempts:
+            print(f"Giving up on {task.url} after {task.attempts} attempts: {error}")
+            self._update_own(task, status='failed', leased_until=None, last_error=error)
+            return
+        delay = self.retry_delay * 2 ** (task.attempts - 1)
+        print(f"Will retry {task.url} in {delay}s (attempt {task.attempts} of {self.max_attempts} failed: {error})")
+        self._update_own(task, status='pending', leased_until=None, last_error=error,
+                         available_at=datetime.utcnow() + timedelta(seconds=delay))
+
+    def release(self, task):
+        """Hand an unfinished page back at once, without counting the attempt (e.g. on Ctrl+C)."""
+        self._update_own(task, status='pending', leased_until=None, attempts=CrawlTask.attempts - 1)
+
+    def wait_for_work(self, poll_interval=None):
+        """Sleep while other workers or retry backoffs may still produce pages; False once the queue is drained."""
+        now = datetime.utcnow()
+        # Expired leases without attempts left can no longer be claimed
+        self.db_session.execute(
+            update(CrawlTask)
+            .where(CrawlTask.status == 'leased', CrawlTask.leased_until < now, CrawlTask.attempts >= self.max_attempts)
+            .values(status='failed', last_error='lease expired', updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        active = self.db_session.execute(select(exists().where(CrawlTask.status.in_(('pending', 'leased'))))).scalar()
+        self.db_session.commit()
+        if not active:
+            return False
+        time.sleep(Config.SCRAPER_QUEUE_POLL_INTERVAL if poll_interval is None else poll_interval)
+        return True
+
+    def retry_failed(self):
+        """Give every failed page a fresh set of attempts; returns how many were requeued.
+
+        Failed fight-details pages are dropped instead: their event failed
+        too, and scraping it again fetches them.
+        """
+        self.db_session.execute(
+            delete(CrawlTask)
+            .where(CrawlTask.status == 'failed', CrawlTask.url.like('%/fight-details/%'))
+            .execution_options(synchronize_session=False)
+        )
+        result = self.db_session.execute(
+            update(CrawlTask)
+            .where(CrawlTask.status == 'failed')
+            .values(status='pending', attempts=0, lease_owner=None, leased_until=None,
+                    available_at=datetime.utcnow(), updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        self.db_session.commit()
+        return result.rowcount
+
+    def counts(self):
+        """Number of pages per status."""
+        rows = self.db_session.execute(select(CrawlTask.status, func.count()).group_by(CrawlTask.status)).all()
+        self.db_session.commit()
+        return dict(rows)
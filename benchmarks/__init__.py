@@ -0,0 +1 @@
+"""Benchmarks for the scraper, run against a frozen copy of UFCStats pages (see fixtures.py)."""
@@ -0,0 +1,134 @@
+"""End-to-end crawl benchmark: main_scraper against a local stand-in for ufcstats.com.
+
+Starts a CorpusServer (the frozen corpus at UFCStats paths, with optional
+latency and injected errors), runs a full crawl from one event page into a
+throwaway SQLite database and reports pages/sec, DB statements per page,
+commit count and wall time. No network access is needed, so changes to
+fetching, concurrency and persistence can be measured reproducibly:
+
+    python -m benchmarks.bench_crawl
+    python -m benchmarks.bench_crawl --latency 80 --jitter 40 --error-rate 0.02
+    python -m benchmarks.bench_crawl --async --requests-per-second 5 --output crawl.json
+"""
+import contextlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import click
+
+from benchmarks.fixtures import CorpusServer, corpus_paths
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+TABLES = ('events', 'fighters', 'fights', 'fight_round_stats')
+
+
+def run_crawl(server, start_path, use_async=False):
+    """Crawl from start_path into a fresh database; returns the measurements as a dict.
+
+    Must run with the scraper settings already in os.environ, since
+    app.config reads them on import.
+    """
+    from flask_migrate import upgrade
+    from sqlalchemy import event, text
+    from app import create_app, db
+
+    app = create_app()
+    counts = {'statements': 0, 'commits': 0}
+    lock = threading.Lock() # The async crawler writes from worker threads
+
+    def count(key):
+        def listener(*args):
+            with lock:
+                counts[key] += 1
+        return listener
+
+    with app.app_context(), open(os.devnull, 'w') as devnull:
+        with contextlib.redirect_stderr(devnull):
+            upgrade(directory=MIGRATIONS_DIR)
+        event.listen(db.engine, 'before_cursor_execute', count('statements'))
+        event.listen(db.engine, 'commit', count('commits'))
+
+        start = time.perf_counter()
+        # The scraper prints progress for every page; keep it out of the report
+        with contextlib.redirect_stdout(devnull):
+            if use_async:
+                from app.async_scraper import async_main_scraper
+                async_main_scraper(server.url(start_path))
+            else:
+                from app.scraper import main_scraper
+                main_scraper(server.url(start_path))
+        wall_time = time.perf_counter() - start
+
+        rows = {table: db.session.execute(text(f"SELECT count(*) FROM {table}")).scalar() for table in TABLES}
+        db.session.remove()
+        db.engine.dispose()
+
+    pages = server.pages
+    return {
+        'wall_time_s': round(wall_time, 3),
+        'requests': server.requests,
+        'pages': pages,
+        'errors': server.errors,
+        'pages_per_sec': round(pages / wall_time, 2) if wall_time else None,
+        'statements': counts['statements'],
+        'statements_per_page': round(counts['statements'] / pages, 2) if pages else None,
+        'commits': counts['commits'],
+        'rows': rows,
+    }
+
+
+@click.command()
+@click.option('--start', 'start_path', default=None, help='Corpus path to start from (default: the first event page).')
+@click.option('--async', 'use_async', is_flag=True, help='Crawl with the asyncio crawler instead of main_scraper.')
+@click.option('--latency', default=0.0, show_default=True, help='Milliseconds added to every response.')
+@click.option('--jitter', default=0.0, show_default=True, help='Up to this many more milliseconds, at random.')
+@click.option('--error-rate', default=0.0, show_default=True, help='Fraction of requests answered with an error.')
+@click.option('--error-status', default=503, show_default=True, help='HTTP status of injected errors.')
+@click.option('--seed', default=0, show_default=True, help='Seed for jitter and error injection.')
+@click.option('--requests-per-second', default=0.0, show_default=True, help='SCRAPER_REQUESTS_PER_SECOND for the crawl (0 = unlimited).')
+@click.option('--parse-workers', default=None, type=int, help='SCRAPER_PARSE_WORKERS for the crawl (default: as configured).')
+@click.option('--output', type=click.Path(dir_okay=False), help='Also write the results as JSON to this file.')
+def main(start_path, use_async, latency, jitter, error_rate, error_status, seed, requests_per_second, parse_workers, output):
+    """Benchmark a full crawl against the local UFCStats stand-in."""
+    start_path = start_path or corpus_paths('event-details')[0]
+
+    with tempfile.TemporaryDirectory(prefix='mma-crawl-') as tmp:
+        # A fresh database and frontier, no page cache (every page is fetched), no page archive
+        # and the requested rate. Set before app.config is imported.
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tmp, 'crawl.sqlite3')
+        os.environ['SCRAPER_FRONTIER_PATH'] = os.path.join(tmp, 'frontier.sqlite3')
+        os.environ['SCRAPER_CACHE_DIR'] = ''
+        os.environ['SCRAPER_ARCHIVE_DIR'] = ''
+        os.environ['SCRAPER_REQUESTS_PER_SECOND'] = str(requests_per_second)
+        if parse_workers is not None:
+            os.environ['SCRAPER_PARSE_WORKERS'] = str(parse_workers)
+
+        with CorpusServer(latency=latency / 1000, jitter=jitter / 1000, error_rate=error_rate,
+                          error_status=error_status, seed=seed) as server:
+            results = run_crawl(server, start_path, use_async)
+
+    results['settings'] = {
+        'start': start_path, 'async': use_async, 'latency_ms': latency, 'jitter_ms': jitter,
+        'error_rate': error_rate, 'requests_per_second': requests_per_second,
+        'parse_workers': os.environ.get('SCRAPER_PARSE_WORKERS', 'default'),
+    }
+
+    click.echo(f"Crawl from {start_path} ({'async' if use_async else 'main_scraper'})")
+    click.echo(f"  wall time            {results['wall_time_s']:.2f} s")
+    click.echo(f"  pages                {results['pages']} ({results['errors']} injected errors, {results['requests']} requests)")
+    click.echo(f"  pages/sec            {results['pages_per_sec']}")
+    click.echo(f"  statements           {results['statements']} ({results['statements_per_page']} per page)")
+    click.echo(f"  commits              {results['commits']}")
+    click.echo(f"  rows                 " + ', '.join(f"{table} {n}" for table, n in results['rows'].items()))
+
+    if output:
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,301 @@
+"""Parser benchmark suite over the frozen page corpus in benchmarks/corpus/.
+
+Times the pure parsers (parse_*_page, parse_round_stats and the whole-fight
+table parsers) on every corpus page, and the scrape_* functions end to end
+against a local CorpusServer and a throwaway SQLite database. Each benchmark
+reports the time per call (best of --repeat runs), records produced per
+second and the peak memory (tracemalloc) of a single call, compared with
+benchmarks/baseline.json:
+
+    python -m benchmarks.bench_parsers                  # run and compare with the baseline
+    python -m benchmarks.bench_parsers --save-baseline  # store this run as the new baseline
+
+Exits with status 1 when a benchmark is slower than its baseline (or needs
+more memory) by more than --tolerance. Timings depend on the machine, so
+save a baseline on yours before comparing changes.
+"""
+import contextlib
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import click
+
+# Scrape benchmarks talk to the local corpus server only: no page cache, no rate limit,
+# and pages parsed in this process (set SCRAPER_PARSE_WORKERS to time the parse pool instead).
+# These have to be set before app.config is imported.
+os.environ['SCRAPER_CACHE_DIR'] = ''
+os.environ['SCRAPER_REQUESTS_PER_SECOND'] = '0'
+os.environ.setdefault('SCRAPER_PARSE_WORKERS', '1')
+
+from benchmarks.fixtures import CorpusServer, corpus_paths, read_page, PAGE_TYPES, SITE_URL
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+PARSER_BENCHMARKS = ('parse_event_page', 'parse_fighter_page', 'parse_fight_page', 'parse_round_stats',
+                     'parse_totals_table', 'parse_significant_strikes_table')
+SCRAPE_BENCHMARKS = ('scrape_event', 'scrape_fighter', 'scrape_fight_details')
+
+
+def page_url(path):
+    """The ufcstats.com URL of a corpus page, as the parsers see it in links."""
+    return f"{SITE_URL}/{path}"
+
+
+def page_path(url):
+    """The corpus path of a ufcstats.com URL found in a corpus page."""
+    return url[len(SITE_URL) + 1:]
+
+
+def record_count(record):
+    """Records a parsed page yields: the page's own record plus its fights or rounds."""
+    if record is None:
+        return 0
+    return 1 + len(getattr(record, 'fights', None) or getattr(record, 'rounds', None) or ())
+
+
+def parser_cases(names):
+    """Calls to time for the pure-parser benchmarks, as {name: [(callable, records), ...]}."""
+    from app import parsers
+
+    cases = {name: [] for name in names}
+    for path in corpus_paths('event-details'):
+        content = read_page(path)
+        if 'parse_event_page' in cases:
+            record = parsers.parse_event_page(content, page_url(path))
+            cases['parse_event_page'].append((lambda c=content, u=page_url(path): parsers.parse_event_page(c, u), record_count(record)))
+    for path in corpus_paths('fighter-details'):
+        content = read_page(path)
+        if 'parse_fighter_page' in cases:
+            record = parsers.parse_fighter_page(content, page_url(path))
+            cases['parse_fighter_page'].append((lambda c=content, u=page_url(path): parsers.parse_fighter_page(c, u), record_count(record)))
+    for path in corpus_paths('fight-details'):
+        content = read_page(path)
+        record = parsers.parse_fight_page(content, page_url(path))
+        if 'parse_fight_page' in cases:
+            cases['parse_fight_page'].append((lambda c=content, u=page_url(path): parsers.parse_fight_page(c, u), record_count(record)))
+
+        # The table parsers run on an already-built soup, as parse_fight_page calls them
+        soup = parsers.make_soup(content, parsers.FIGHT_PAGE_PARTS)
+        totals_table, sig_strike_table = parsers.find_totals_tables(soup)
+        col1_is_fighter1 = parsers.determine_fighter_order(totals_table, record.fighter1_name) if totals_table else None
+        if 'parse_round_stats' in cases:
+            cases['parse_round_stats'].append((lambda s=soup, o=col1_is_fighter1: parsers.parse_round_stats(s, o), len(record.rounds)))
+        if 'parse_totals_table' in cases and totals_table:
+            cases['parse_totals_table'].append(
+                (lambda t=totals_table, o=col1_is_fighter1: parsers.parse_totals_table(t, parsers.StatLine(), parsers.StatLine(), o), 1))
+        if 'parse_significant_strikes_table' in cases and sig_strike_table:
+            cases['parse_significant_strikes_table'].append(
+                (lambda t=sig_strike_table, o=col1_is_fighter1: parsers.parse_significant_strikes_table(t, parsers.StatLine(), parsers.StatLine(), o), 1))
+    return cases
+
+
+def scrape_cases(names, server, db_session):
+    """Calls to time for the scrape_* benchmarks, against the corpus server.
+
+    Every event is scraped once first, so each timed call re-scrapes a page
+    into a warm database (as a re-crawl or replay does) and the fight-details
+    pages have stored fights to attach to.
+    """
+    from app import parsers, scraper
+    from app.frontier import CrawlFrontier
+    from app.models import Fight
+    from app.persistence import UnitOfWork
+
+    # Each call gets a fresh in-memory frontier: the scrape functions use its processed set's
+    # dead-letter methods (mark_failed, has_failed, discard), which a plain set lacks
+    def scrape_event(path):
+        frontier = CrawlFrontier()
+        with UnitOfWork(db_session):
+            scraper.scrape_event(server.url(path), db_session, frontier, frontier.processed)
+
+    def scrape_fighter(path):
+        frontier = CrawlFrontier()
+        with UnitOfWork(db_session):
+            scraper.scrape_fighter(server.url(path), db_session, frontier, frontier.processed)
+
+    def scrape_fight_details(path, fight):
+        with UnitOfWork(db_session):
+            scraper.scrape_fight_details(server.url(path), fight, db_session, CrawlFrontier().processed)
+
+    records = {}
+    for page_type in PAGE_TYPES:
+        for path in corpus_paths(page_type):
+            records[path] = parsers.parse_page(read_page(path), page_url(path))
+
+    for path in corpus_paths('event-details'):
+        scrape_event(path)
+
+    cases = {name: [] for name in names}
+    if 'scrape_event' in cases:
+        for path in corpus_paths('event-details'):
+            # An event page brings in its whole card: every fighter and fight-details page on it
+            card = {page_path(url) for url in parsers.card_page_urls(records[path])}
+            count = record_count(records[path]) + sum(record_count(records.get(card_path)) for card_path in card)
+            cases['scrape_event'].append((lambda p=path: scrape_event(p), count))
+    if 'scrape_fighter' in cases:
+        for path in corpus_paths('fighter-details'):
+            cases['scrape_fighter'].append((lambda p=path: scrape_fighter(p), record_count(records[path])))
+    if 'scrape_fight_details' in cases:
+        stored = {row.ufcstats_id: {'id': row.id, 'fighter1_id': row.fighter1_id, 'fighter2_id': row.fighter2_id}
+                  for row in db_session.query(Fight.id, Fight.ufcstats_id, Fight.fighter1_id, Fight.fighter2_id)}
+        for path in corpus_paths('fight-details'):
+            fight = stored[path.rsplit('/', 1)[-1]]
+            cases['scrape_fight_details'].append((lambda p=path, f=fight: scrape_fight_details(p, f), record_count(records[path])))
+    return cases
+
+
+def measure(cases, repeat):
+    """Time each call (best of `repeat` runs after a warm-up) and trace one more run for peak memory."""
+    times = []
+    records = 0
+    peak = 0
+    for call, count in cases:
+        call()
+        samples = []
+        # Like timeit: keep collector pauses (which depend on whatever else is alive) out of the timings
+        gc.collect()
+        gc.disable()
+        try:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                call()
+                samples.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+        times.append(min(samples))
+        records += count
+
+        tracemalloc.start()
+        call()
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    total = sum(times)
+    return {
+        'calls': len(cases),
+        'ms_per_call': round(1000 * total / len(cases), 3),
+        'records_per_sec': round(records / total, 1) if total else None,
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+def run_benchmarks(names, repeat):
+    """Run the named benchmarks and return {name: result}."""
+    from app.parsers import html_parser
+
+    results = {}
+    # The parsers and scrapers print progress for every page; keep it out of the report
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        html_parser()
+        parser_names = [name for name in names if name in PARSER_BENCHMARKS]
+        if parser_names:
+            for name, cases in parser_cases(parser_names).items():
+                results[name] = measure(cases, repeat)
+
+        scrape_names = [name for name in names if name in SCRAPE_BENCHMARKS]
+        if scrape_names:
+            results.update(run_scrape_benchmarks(scrape_names, repeat, devnull))
+    return results
+
+
+def run_scrape_benchmarks(names, repeat, devnull):
+    from flask_migrate import upgrade
+    from app import create_app, db
+    from app.fetcher import close_fetcher
+    from app.identity import fighter_identities
+    from app.parse_pool import close_parse_pool
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='mma-bench-') as tmp:
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tmp, 'bench.sqlite3')
+        app = create_app()
+        with app.app_context(), CorpusServer() as server:
+            with contextlib.redirect_stderr(devnull):
+                upgrade(directory=MIGRATIONS_DIR)
+            fighter_identities.clear()
+            try:
+                for name, cases in scrape_cases(names, server, db.session).items():
+                    results[name] = measure(cases, repeat)
+            finally:
+                close_fetcher()
+                close_parse_pool()
+                fighter_identities.clear()
+                db.session.remove()
+                db.engine.dispose()
+    return results
+
+
+def environment():
+    from app.parsers import html_parser
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'html_parser': html_parser(),
+        'parse_workers': os.environ['SCRAPER_PARSE_WORKERS'],
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Print the report; return the names of benchmarks that regressed beyond tolerance."""
+    base_results = baseline.get('results', {}) if baseline else {}
+    regressions = []
+    click.echo(f"{'benchmark':<34}{'calls':>6}{'ms/call':>11}{'records/s':>12}{'peak KiB':>10}{'vs baseline':>14}")
+    for name, result in results.items():
+        base = base_results.get(name)
+        change = ''
+        if base:
+            ratio = result['ms_per_call'] / base['ms_per_call']
+            change = f"{(ratio - 1) * 100:+.1f}%"
+            memory_ratio = result['peak_kib'] / base['peak_kib'] if base['peak_kib'] else 1
+            if ratio > 1 + tolerance or memory_ratio > 1 + tolerance:
+                change += ' SLOWER' if ratio > 1 + tolerance else ' MEMORY'
+                regressions.append(name)
+        click.echo(f"{name:<34}{result['calls']:>6}{result['ms_per_call']:>11.2f}{result['records_per_sec'] or 0:>12.1f}"
+                   f"{result['peak_kib']:>10.1f}{change:>14}")
+    return regressions
+
+
+@click.command()
+@click.option('--benchmark', '-b', 'names', multiple=True, type=click.Choice(PARSER_BENCHMARKS + SCRAPE_BENCHMARKS),
+              help='Run only these benchmarks (repeatable).')
+@click.option('--repeat', default=5, show_default=True, help='Timed runs per page.')
+@click.option('--tolerance', default=0.25, show_default=True, help='Allowed slowdown over the baseline (0.25 = 25%).')
+@click.option('--baseline', 'baseline_path', default=BASELINE_PATH, show_default=True, help='Baseline file to compare with.')
+@click.option('--save-baseline', is_flag=True, help='Store this run as the baseline instead of comparing.')
+def main(names, repeat, tolerance, baseline_path, save_baseline):
+    """Benchmark the page parsers and scrapers over the frozen corpus."""
+    names = names or PARSER_BENCHMARKS + SCRAPE_BENCHMARKS
+    results = run_benchmarks(names, repeat)
+    env = environment()
+
+    baseline = None
+    if not save_baseline and os.path.exists(baseline_path):
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        if baseline.get('environment') != env:
+            click.echo(f"Note: baseline was recorded with {baseline.get('environment')}, this run uses {env}.")
+
+    regressions = compare(results, baseline, tolerance)
+
+    if save_baseline:
+        if os.path.exists(baseline_path):
+            with open(baseline_path) as f:
+                previous = json.load(f).get('results', {})
+            results = {**previous, **results} # A partial run (--benchmark) keeps the other entries
+        with open(baseline_path, 'w') as f:
+            json.dump({'environment': env, 'repeat': repeat, 'results': results}, f, indent=2, sort_keys=True)
+            f.write('\n')
+        click.echo(f"Saved baseline to {baseline_path}")
+    elif regressions:
+        click.echo(f"{len(regressions)} benchmark(s) regressed by more than {tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""Benchmark fixtures: the frozen page corpus and a local server that serves it.
+
+The corpus in benchmarks/corpus/ holds event, fighter and fight-details pages
+in UFCStats markup (site chrome included), stored under their UFCStats paths:
+corpus/fight-details/<id>.html is served as /fight-details/<id>. It covers
+title and non-title bouts, early finishes and five-round decisions, a draw,
+a no contest, fight-details pages that list the fighters in the other order
+than the card, and debut fighters with missing profile data.
+"""
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+
+# Links inside the corpus point here; the server rewrites them to its own address
+SITE_URL = 'http://ufcstats.com'
+
+PAGE_TYPES = ('event-details', 'fighter-details', 'fight-details')
+
+
+def corpus_paths(page_type, corpus_dir=CORPUS_DIR):
+    """Site paths (e.g. 'fight-details/<id>') of every corpus page of one type, sorted."""
+    directory = os.path.join(corpus_dir, page_type)
+    return sorted(f"{page_type}/{name[:-len('.html')]}" for name in os.listdir(directory) if name.endswith('.html'))
+
+
+def read_page(path, corpus_dir=CORPUS_DIR):
+    """Raw bytes of the corpus page at a site path, as stored (links point at ufcstats.com)."""
+    with open(os.path.join(corpus_dir, path + '.html'), 'rb') as f:
+        return f.read()
+
+
+class CorpusServer:
+    """Serves the corpus on 127.0.0.1 at the same paths as ufcstats.com.
+
+    Use as a context manager; url(path) gives the local URL of a page. Every
+    http://ufcstats.com link in a served page is rewritten to this server, so a
+    scrape that follows links never leaves it. Unknown paths get a 404.
+
+    To stand in for the real site under load, each response can be delayed by
+    `latency` seconds plus up to `jitter` more, and a fraction `error_rate` of
+    requests is answered with `error_status` instead of the page. `seed` makes
+    the choice of failed requests repeatable for a given request order.
+    """
+
+    def __init__(self, corpus_dir=CORPUS_DIR, port=0, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503, seed=None):
+        self.corpus_dir = corpus_dir
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self.requests = 0 # Every request received
+        self.pages = 0 # Pages served (200)
+        self.errors = 0 # Injected errors
+        self._server = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def url(self, path):
+        return f"{self.base_url}/{path}"
+
+    def page(self, path):
+        """Body served for a site path (links rewritten), or None if it is not in the corpus."""
+        try:
+            content = read_page(path, self.corpus_dir)
+        except (OSError, ValueError):
+            return None
+        return content.replace(SITE_URL.encode(), self.base_url.encode())
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1' # Keep-alive, like the real site
+            # Headers and body go out in separate writes; without this, delayed ACKs add ~40 ms per page
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                    delay = server.latency + (server._random.uniform(0, server.jitter) if server.jitter else 0)
+                    fail = server.error_rate and server._random.random() < server.error_rate
+                    if fail:
+                        server.errors += 1
+                if delay:
+                    time.sleep(delay)
+                if fail:
+                    self.send_error(server.error_status)
+                    return
+                path = self.path.split('?', 1)[0].strip('/')
+                body = server.page(path) if '..' not in path else None
+                if body is None:
+                    self.send_error(404)
+                    return
+                with server._lock:
+                    server.pages += 1
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass # Keep benchmark output readable
+
+        return Handler
+
+    def start(self):
+        self._server = ThreadingHTTPServer(('127.0.0.1', self.port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name='corpus-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
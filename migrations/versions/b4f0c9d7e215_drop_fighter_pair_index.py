@@ -0,0 +1,32 @@
+"""Drop the fighter pair index
+
+ix_fights_fighter_pair had no reader: fights are matched on ufcstats_id,
+and the legacy fighter-pair match looks only at one event's fights.
+
+Revision ID: b4f0c9d7e215
+Revises: e7a91c3f2d64
+Create Date: 2026-10-17 19:41:05.102377
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4f0c9d7e215'
+down_revision = 'e7a91c3f2d64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.drop_index('ix_fights_fighter_pair', table_name='fights')
+
+
+def downgrade():
+    # As created in a3b37e2f6572; SQLite has no least()/greatest(), its scalar min()/max() do the same
+    if op.get_bind().dialect.name == 'sqlite':
+        low, high = 'min(fighter1_id, fighter2_id)', 'max(fighter1_id, fighter2_id)'
+    else:
+        low, high = 'least(fighter1_id, fighter2_id)', 'greatest(fighter1_id, fighter2_id)'
+    op.create_index('ix_fights_fighter_pair', 'fights', [sa.text(low), sa.text(high)], unique=False)
@@ -4,12 +4,79 @@ import click
 app = create_app()
 
 @app.cli.command('scrape')
-@click.option('--start-url', required=True, help='URL to start scraping from')
-def scrape_command(start_url):
+@click.option('--start-url', help='URL to start scraping from (optional with --replay)')
+@click.option('--async', 'use_async', is_flag=True, help='Use the asyncio crawler (concurrent fetches, DB writes on a worker thread)')
+@click.option('--replay', is_flag=True, help='Re-parse pages from the page cache without touching the network')
+@click.option('--resume', is_flag=True, help='Continue the crawl saved in the frontier checkpoint file')
+@click.option('--retry-failed', is_flag=True, help='Continue the saved crawl, retrying the pages that could not be fetched')
+def scrape_command(start_url, use_async, replay, resume, retry_failed):
     """Run the scraper starting from the given URL."""
-    from app.scraper import main_scraper
-    click.echo(f'Starting scraper at: {start_url}')
-    main_scraper(start_url)
+    if not start_url and not (replay or resume or retry_failed):
+        raise click.UsageError('--start-url is required unless --replay, --resume or --retry-failed is used')
+    if use_async and retry_failed:
+        raise click.UsageError('--retry-failed is not supported by the async crawler')
+    if use_async and replay:
+        raise click.UsageError('--async and --replay cannot be combined')
+    if replay and (resume or retry_failed):
+        raise click.UsageError('--replay does not use the saved frontier, drop --resume/--retry-failed')
+    if replay:
+        click.echo(f'Replaying cached pages from: {start_url or "all cached events"}')
+    elif resume or retry_failed:
+        click.echo('Resuming saved crawl' + (f' (also queueing {start_url})' if start_url else ''))
+    else:
+        click.echo(f'Starting scraper at: {start_url}')
+    if use_async:
+        from app.async_scraper import async_main_scraper
+        async_main_scraper(start_url, resume=resume)
+    else:
+        from app.scraper import main_scraper
+        main_scraper(start_url, replay=replay, resume=resume, retry_failed=retry_failed)
+
+@app.cli.command('sync')
+@click.option('--recent-days', type=int, default=None, help='Also re-scrape events from the last N days (default: SCRAPER_RECENT_EVENT_DAYS)')
+@click.option('--dry-run', is_flag=True, help='Only list the events that would be synced')
+def sync_command(recent_days, dry_run):
+    """Scrape only new or changed events from the UFCStats event listing."""
+    from app.sync import sync_events
+    sync_events(recent_days=recent_days, dry_run=dry_run)
+
+@app.cli.command('worker')
+@click.option('--seed', 'seed_urls', multiple=True, help='URL to add to the shared crawl queue first (repeatable)')
+@click.option('--worker-id', help='Name recorded on claimed pages (default: host:pid)')
+@click.option('--retry-failed', is_flag=True, help='Requeue the pages marked failed in the shared queue first')
+def worker_command(seed_urls, worker_id, retry_failed):
+    """Crawl from the shared crawl_queue table alongside other workers."""
+    from app.scraper import worker_scraper
+    worker_scraper(seed_urls, worker_id=worker_id, retry_failed=retry_failed)
+
+@app.cli.command('archive')
+@click.argument('url')
+@click.option('--output', type=click.Path(dir_okay=False), help='Write a stored version of the page to this file')
+@click.option('--version', 'version', type=int, default=0, help='Version to write with --output (1 = oldest, default: latest)')
+def archive_command(url, output, version):
+    """List the archived versions of a page, or write one out."""
+    from datetime import datetime
+    from app.config import Config
+    from app.page_archive import PageArchive
+    if not Config.SCRAPER_ARCHIVE_DIR:
+        raise click.UsageError('The page archive is disabled (set SCRAPER_ARCHIVE_DIR)')
+    archive = PageArchive(Config.SCRAPER_ARCHIVE_DIR)
+    try:
+        versions = archive.versions(url)
+        if not versions:
+            raise click.ClickException(f'{url} is not in the archive')
+        if not output:
+            for i, (fetched_at, digest, name, offset) in enumerate(versions, 1):
+                click.echo(f'{i:>3}  {datetime.fromtimestamp(fetched_at):%Y-%m-%d %H:%M:%S}  {digest}  {name}@{offset}')
+            return
+        if not 0 <= version <= len(versions):
+            raise click.UsageError(f'--version must be between 1 and {len(versions)}')
+        page = archive.get(url, at=versions[version - 1][0] if version else None)
+        with open(output, 'wb') as f:
+            f.write(page.content)
+        click.echo(f'Wrote the version fetched {datetime.fromtimestamp(page.fetched_at):%Y-%m-%d %H:%M:%S} to {output}')
+    finally:
+        archive.close()
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000) 
\ No newline at end of file